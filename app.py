@@ -15,7 +15,7 @@ import socket
 import shutil
 
 # Backend imports
-from backend.mongo_manager import MongoManager
+from backend.mongo_manager import get_manager
 from backend.hdfs_manager import HDFSManager
 from backend.mapreduce_manager import MapReduceManager
 from backend.hive_manager import HiveManager
@@ -68,7 +68,7 @@ st.markdown("""
 # ==================== SESSION STATE ====================
 class SessionState:
     def __init__(self):
-        self.mongo = MongoManager()
+        self.mongo = get_manager()
         self.hdfs = HDFSManager()
         self.mr = MapReduceManager()
         self.hive = HiveManager()
@@ -239,6 +239,7 @@ with tab2:
                 try:
                     st.write("📂 Processing files...")
                     report = svc.ingestion.process_and_upload()
+                    svc.model.clear_cache()
                     st.write("✅ Processing complete!")
                     status.update(label="Ingestion Complete!", state="complete", expanded=False)
                     with st.expander("📋 View Detailed Report", expanded=True):
@@ -306,7 +307,10 @@ with tab3:
                     
                     if len(selected_sensors) > 1:
                         st.subheader("Sensor Correlation Heatmap")
-                        corr_matrix = df_avg[selected_sensors].corr()
+                        # Correlated server-side over the same per-unit averages (labels kept as plotted)
+                        corr_matrix = svc.mongo.get_sensor_correlations(
+                            dataset_id, "train", sensors=[s[len('avg_'):] for s in selected_sensors], per_unit=True
+                        ).set_axis(selected_sensors, axis=0).set_axis(selected_sensors, axis=1)
                         fig_corr = px.imshow(corr_matrix, title="Correlation Matrix", color_continuous_scale="RdBu_r")
                         fig_corr.update_layout(template="plotly_dark")
                         st.plotly_chart(fig_corr, use_container_width=True)
@@ -874,7 +878,7 @@ with tab8:
         
         st.markdown(f"""
         **Training Configuration:**
-        - Algorithm: Random Forest Regressor
+        - Algorithm: Histogram Gradient Boosting Regressor
         - Features: 3 operational settings + 21 sensors
         - Target: Remaining Useful Life (RUL)
         """)
@@ -883,7 +887,7 @@ with tab8:
             with st.status(f"Training model for {dataset_id_pred}...", expanded=True) as status:
                 st.write("📥 Loading training data...")
                 st.write("⚙️ Engineering features...")
-                st.write("🌲 Training Random Forest...")
+                st.write("🌲 Training Gradient Boosting model...")
                 
                 success, msg = svc.model.train_model(dataset_id_pred)
                 
@@ -905,8 +909,8 @@ with tab8:
             with st.spinner("Running inference..."):
                 res, msg = svc.model.predict_rul(dataset_id_pred, unit_to_test)
                 
-                if res is not None and not res.empty:
-                    last_row = res.iloc[-1]
+                if res is not None and len(res) > 0:
+                    last_row = res[-1]
                     pred_rul = last_row['predicted_rul']
                     curr_cycle = last_row['time_cycles']
                     
@@ -915,7 +919,7 @@ with tab8:
                     col2.metric("Predicted RUL", f"{pred_rul:.1f} cycles")
                     col3.metric("Total Predicted Life", f"{curr_cycle + pred_rul:.1f}")
                     
-                    fig = px.line(res, x='time_cycles', y='predicted_rul',
+                    fig = px.line(pd.DataFrame(res), x='time_cycles', y='predicted_rul',
                                 title=f"RUL Trajectory for Unit {unit_to_test}",
                                 labels={'predicted_rul': 'Predicted RUL', 'time_cycles': 'Operational Cycle'})
                     fig.update_layout(template="plotly_dark")
@@ -132,7 +132,10 @@ with tab3:
                     # Correlation heatmap
                     if len(selected_sensors) > 1:
                         st.subheader("Sensor Correlation Heatmap")
-                        corr_matrix = df_avg[selected_sensors].corr()
+                        # Correlated server-side over the same per-unit averages (labels kept as plotted)
+                        corr_matrix = svc.mongo.get_sensor_correlations(
+                            dataset_id, "train", sensors=[s[len('avg_'):] for s in selected_sensors], per_unit=True
+                        ).set_axis(selected_sensors, axis=0).set_axis(selected_sensors, axis=1)
                         
                         fig_corr = px.imshow(
                             corr_matrix,
@@ -10,17 +10,43 @@ DB_NAME = "BDA_Project"
 COLLECTION_NAME = "sensors"
 
 # MongoDB Indexing Configuration
+# Non-partial index hinted by dataset_id + dataset_type reads (finds, aggregations)
+MONGO_DATASET_INDEX = [("dataset_id", 1), ("dataset_type", 1), ("unit_number", 1)]
+# Non-partial index hinted by per-unit time-series reads: equality on dataset_id and
+# unit_number, then walked in time_cycles order (no in-memory sort)
+MONGO_TRENDS_INDEX = [("dataset_id", 1), ("unit_number", 1), ("time_cycles", 1)]
 MONGO_INDEXES = [
+    MONGO_DATASET_INDEX,
     # Compound index for efficient querying by dataset and unit
-    [("dataset_id", 1), ("unit_number", 1), ("time_cycles", 1)],
-    # Index for dataset type filtering
-    [("dataset_type", 1), ("dataset_id", 1)],
+    MONGO_TRENDS_INDEX,
     # Index for time-series queries
     [("unit_number", 1), ("time_cycles", 1)],
 ]
 
+# Natural key of a reading; created as a unique index and used for ingestion upserts.
+# The index is partial (RUL rows have no time_cycles), so the server only uses it for
+# queries that imply its filter, and rejects it as a hint for any other query.
+MONGO_NATURAL_KEY = ["dataset_id", "dataset_type", "unit_number", "time_cycles"]
+
 # MongoDB Batch Configuration
 MONGO_BATCH_SIZE = 1000  # Records per batch for bulk insertion
+MONGO_INSERT_WORKERS = 8  # Batches inserted concurrently
+MONGO_INGEST_CHUNK_ROWS = 10000  # Rows parsed per chunk when ingesting a file path
+# Bulk ingest writes are acknowledged by the primary without waiting for the journal
+MONGO_INGEST_WRITE_CONCERN = {"w": 1, "j": False}
+MONGO_CURSOR_BATCH_SIZE = 5000  # Documents per getMore when streaming query results
+# In-process cache of dashboard aggregations (cleared by ingest/update/delete)
+MONGO_QUERY_CACHE = {"maxsize": 64, "ttl": 300}
+# Client connection pool: kept warm between queries, sized above MONGO_INSERT_WORKERS.
+# Wire compression: zstd (zstandard, in requirements.txt), else zlib (standard library).
+MONGO_POOL_OPTIONS = {
+    "maxPoolSize": 50,
+    "minPoolSize": 10,
+    "maxIdleTimeMS": 60000,
+    # Fail fast instead of queueing forever when every pooled connection is busy
+    "waitQueueTimeoutMS": 5000,
+    "compressors": "zstd,zlib",
+}
 
 # ==================== HDFS CONFIGURATION ====================
 # If using Docker, set USE_DOCKER = True and specify container name
@@ -37,6 +63,11 @@ HDFS_DIRS = {
     "train": f"{HDFS_ROOT}/processed/train",
     "test": f"{HDFS_ROOT}/processed/test",
     "rules": f"{HDFS_ROOT}/processed/rul",
+    # Columnar copies partitioned by dataset_id (dataset_id=FD001/...) for Hive
+    "parquet": f"{HDFS_ROOT}/processed/parquet",
+    "parquet_train": f"{HDFS_ROOT}/processed/parquet/train",
+    "parquet_test": f"{HDFS_ROOT}/processed/parquet/test",
+    "parquet_rul": f"{HDFS_ROOT}/processed/parquet/rul",
     "mapreduce_output": f"{HDFS_ROOT}/mapreduce_output",
     "models": f"{HDFS_ROOT}/models",
     "uploads": f"{HDFS_ROOT}/uploads",
@@ -134,6 +165,9 @@ DATASET_METADATA = {
     }
 }
 
+# Whitelist of dataset IDs; anything else is rejected before it reaches an HDFS path
+VALID_DATASET_IDS = frozenset(DATASET_METADATA)
+
 # Critical sensors for health monitoring (based on domain knowledge)
 CRITICAL_SENSORS = ["sensor_2", "sensor_3", "sensor_4", "sensor_7", "sensor_8", 
                     "sensor_9", "sensor_11", "sensor_12", "sensor_13", "sensor_14", "sensor_15"]
@@ -159,7 +193,9 @@ MAPREDUCE_CONFIG = {
         }
     },
     "runners": ["hadoop"],
-    "default_runner": "hadoop"
+    "default_runner": "hadoop",
+    # Read-only bind mount of mapreduce_jobs/ inside the NameNode container (see docker-compose.yml)
+    "container_jobs_dir": "/opt/jobs"
 }
 
 # ==================== HIVE CONFIGURATION ====================
@@ -173,6 +209,20 @@ HIVE_TABLES = {
 # ==================== MACHINE LEARNING CONFIGURATION ====================
 ML_CONFIG = {
     "models_dir": os.path.join(BASE_DIR, "models"),
+    # Local Parquet cache of HDFS datasets, keyed by (path, HDFS mtime); LRU-evicted
+    "hdfs_cache_dir": os.path.join(BASE_DIR, "models", "cache"),
+    "hdfs_cache_max_bytes": 2 * 1024 ** 3,
+    # Rows per chunk when streaming test data from HDFS into predict
+    "predict_chunk_rows": 10000,
+    # DataFrames kept in memory by ModelService, keyed by (dataset_id, table_type)
+    "memory_cache_frames": 8,
+    # Documents per cursor batch when fetching a dataset from MongoDB
+    "mongo_fetch_batch_size": 10000,
+    # Seconds a MongoDB connection check is reused by ModelService
+    "mongo_status_ttl": 30,
+    # Save models uncompressed and memory-map them on load, so several worker
+    # processes share one page-cached copy of the tree arrays
+    "model_mmap": False,
     "random_state": 42,
     "test_size": 0.2,
     "cv_folds": 5,
@@ -189,6 +239,12 @@ ML_CONFIG = {
             "n_estimators": 100,
             "learning_rate": 0.1,
             "max_depth": 5
+        },
+        "hist_gradient_boosting": {
+            "max_iter": 200,
+            "learning_rate": 0.05,
+            "max_bins": 255,
+            "early_stopping": True
         }
     }
 }
@@ -203,8 +259,8 @@ def get_hdfs_cmd_prefix():
 def get_hive_cmd_prefix():
     """Build Hive command prefix based on Docker or native installation"""
     if USE_DOCKER:
-        return ["docker", "exec", HIVE_SERVER_CONTAINER, "hive", "-e"] 
-    return ["hive", "-e"]
+        return ["docker", "exec", HIVE_SERVER_CONTAINER, "hive"]
+    return ["hive"]
 
 def get_hadoop_cmd_prefix():
     """Build Hadoop command prefix for MapReduce jobs"""
@@ -227,7 +283,7 @@ def get_all_datasets():
 # ==================== VALIDATION HELPERS ====================
 def validate_dataset_id(dataset_id):
     """Validate if dataset ID exists"""
-    return dataset_id in DATASET_METADATA
+    return dataset_id in VALID_DATASET_IDS
 
 def get_expected_columns_count():
     """Get expected number of columns in raw data"""
@@ -1,19 +1,81 @@
 import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from backend.hdfs_manager import HDFSManager
-from backend.mongo_manager import MongoManager
-from backend.config import CMAPS_DIR, CMAPSS_SCHEMA
+from backend.mongo_manager import get_manager
+from backend.config import CMAPS_DIR, CMAPSS_SCHEMA, HDFS_DIRS
 import tempfile
 
 class DataIngestion:
     def __init__(self):
         self.hdfs = HDFSManager()
-        self.mongo = MongoManager()
+        self.mongo = get_manager()
         self.processed_dir = "/bda_project/processed"
         self.hdfs.mkdir(self.processed_dir)
         self.hdfs.mkdir(f"{self.processed_dir}/train")
         self.hdfs.mkdir(f"{self.processed_dir}/test")
         self.hdfs.mkdir(f"{self.processed_dir}/rul")
+        for table_type in ("train", "test", "rul"):
+            self.hdfs.mkdir(HDFS_DIRS[f"parquet_{table_type}"])
+
+    def read_raw_file(self, local_path, columns):
+        """
+        Parses a raw space-separated CMAPSS file with Arrow's multithreaded CSV
+        reader. Trailing spaces come through as extra all-null columns and are
+        dropped; any irregular spacing (a null or non-numeric field among the
+        data columns) falls back to pandas' variable-whitespace tokenizer.
+        """
+        try:
+            table = pacsv.read_csv(
+                local_path,
+                read_options=pacsv.ReadOptions(autogenerate_column_names=True),
+                parse_options=pacsv.ParseOptions(delimiter=' ')
+            )
+            data, padding = table.columns[:len(columns)], table.columns[len(columns):]
+            if (len(data) == len(columns)
+                    and all((pa.types.is_integer(c.type) or pa.types.is_floating(c.type)) and c.null_count == 0
+                            for c in data)
+                    and all(c.null_count == len(c) for c in padding)):
+                return pa.table(data, names=columns).to_pandas()
+        except pa.ArrowInvalid:
+            pass
+        
+        # Read with variable whitespace (C tokenizer: \s+ is handled natively, not as a regex)
+        df = pd.read_csv(local_path, sep=r'\s+', header=None, engine='c')
+        
+        # Filter columns if necessary (sometimes extra empty col at end due to trailing space)
+        df = df.iloc[:, :len(columns)]
+        df.columns = columns
+        return df
+
+    def upload_parquet(self, df, table_type, dataset_id):
+        """
+        Writes one dataset as a snappy Parquet file into its Hive partition
+        directory: parquet/{table_type}/dataset_id={dataset_id}/{dataset_id}.parquet
+        The partition column lives in the path, so it is dropped from the file.
+        """
+        df = df.drop(columns=['dataset_id'])
+        
+        # Match the Hive schema exactly: INT keys, DOUBLE measurements
+        int_cols = [c for c in ('unit_number', 'time_cycles') if c in df.columns]
+        float_cols = [c for c in df.columns if c not in int_cols and c != 'dataset_type']
+        df = df.astype({**{c: 'int32' for c in int_cols}, **{c: 'float64' for c in float_cols}})
+        
+        fd, temp_parquet = tempfile.mkstemp(suffix=f"_{table_type}_{dataset_id}.parquet")
+        os.close(fd)
+        
+        try:
+            df.to_parquet(temp_parquet, engine='pyarrow', compression='snappy', index=False)
+            
+            partition_dir = f"{HDFS_DIRS[f'parquet_{table_type}']}/dataset_id={dataset_id}"
+            self.hdfs.mkdir(partition_dir)
+            hdfs_dest = f"{partition_dir}/{dataset_id}.parquet"
+            success, msg = self.hdfs.upload_file(temp_parquet, hdfs_dest)
+            return success, hdfs_dest if success else msg
+        finally:
+            if os.path.exists(temp_parquet):
+                os.remove(temp_parquet)
 
     def process_and_upload(self):
         """
@@ -49,12 +111,7 @@ class DataIngestion:
 
                 print(f"Processing {filename}...")
 
-                # Read with variable whitespace
-                df = pd.read_csv(local_path, sep=r'\s+', header=None, engine='python')
-                
-                # Filter columns if necessary (sometimes extra empty col at end due to trailing space)
-                df = df.iloc[:, :len(columns)]
-                df.columns = columns
+                df = self.read_raw_file(local_path, columns)
                 
                 # Add dataset_id column
                 df['dataset_id'] = dataset_id
@@ -63,7 +120,12 @@ class DataIngestion:
                 # 1. MongoDB Ingestion
                 if conn:
                     # Ingest only if we haven't already (simple check could be added here, but MongoManager handles upsert/delete-insert)
-                    success, msg = self.mongo.ingest_data(df)
+                    mongo_df = df
+                    if table_type == "rul":
+                        # Line i of RUL_FDxxx.txt is the label of test unit i (Mongo only:
+                        # the HDFS/Hive RUL layout stays rul, dataset_id, dataset_type)
+                        mongo_df = df.assign(unit_number=df.index + 1)
+                    success, msg = self.mongo.ingest_data(mongo_df)
                     if success:
                         status_report.append(f"MONGO SUCCESS: {filename} -> {msg}")
                     else:
@@ -92,6 +154,13 @@ class DataIngestion:
                     if os.path.exists(temp_csv):
                         os.remove(temp_csv)
 
+                # 3. HDFS Parquet (partitioned, backs the Hive tables)
+                success, msg = self.upload_parquet(df, table_type, dataset_id)
+                if success:
+                    status_report.append(f"PARQUET SUCCESS: {filename} -> {msg}")
+                else:
+                    status_report.append(f"PARQUET FAILURE: {filename} -> {msg}")
+
             except Exception as e:
                 status_report.append(f"ERROR: {filename} -> {str(e)}")
         
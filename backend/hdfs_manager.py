@@ -6,11 +6,15 @@ Provides comprehensive HDFS operations with improved error handling and validati
 import subprocess
 import os
 import json
+import re
 from backend.config import (
     get_hdfs_cmd_prefix, HDFS_ROOT, HDFS_DIRS, USE_DOCKER, 
     NAMENODE_CONTAINER, validate_dataset_id
 )
 
+# One `-stat %b,%Y` output line: size in bytes, modification time in ms
+STAT_LINE = re.compile(r"^\d+,\d+$")
+
 class HDFSManager:
     """Manages all HDFS operations with enhanced functionality"""
     
@@ -154,8 +158,8 @@ class HDFSManager:
     
     def download_file(self, hdfs_path, local_path):
         local_dir = os.path.dirname(local_path)
-        if local_dir and not os.path.exists(local_dir):
-            os.makedirs(local_dir)
+        if local_dir:
+            os.makedirs(local_dir, exist_ok=True)
         
         if os.path.exists(local_path):
             os.remove(local_path)
@@ -180,6 +184,52 @@ class HDFSManager:
         else:
             return self.run_command(["-get", hdfs_path, local_path])
 
+    def stat_files(self, hdfs_paths):
+        """
+        Size and modification time for several files in one HDFS call
+        
+        Returns:
+            dict: {hdfs_path: (size_bytes, mtime_ms)}, empty if any path is missing
+        """
+        try:
+            # stderr kept apart: client warnings (e.g. NativeCodeLoader) must not
+            # mix with the stat lines
+            output = subprocess.check_output(
+                self.cmd_prefix + ["-stat", "%b,%Y"] + list(hdfs_paths),
+                stderr=subprocess.PIPE, text=True
+            )
+        except (subprocess.CalledProcessError, OSError):
+            return {}
+        # -stat prints one line per argument, in argument order
+        lines = [line.strip() for line in output.splitlines() if STAT_LINE.match(line.strip())]
+        if len(lines) != len(hdfs_paths):
+            return {}
+        stats = {}
+        for path, line in zip(hdfs_paths, lines):
+            size, mtime = line.split(",")
+            stats[path] = (int(size), int(mtime))
+        return stats
+
+    def cat_files(self, hdfs_paths):
+        """Concatenated raw bytes of several files, read with a single `-cat`"""
+        try:
+            data = subprocess.check_output(
+                self.cmd_prefix + ["-cat"] + list(hdfs_paths), stderr=subprocess.PIPE
+            )
+            return True, data
+        except subprocess.CalledProcessError as e:
+            return False, e.stderr.decode('utf-8') if e.stderr else str(e)
+
+    def open_stream(self, hdfs_path):
+        """
+        Start `hdfs dfs -cat` and return the running process; callers read
+        the binary proc.stdout incrementally instead of waiting for the whole file.
+        """
+        return subprocess.Popen(
+            self.cmd_prefix + ["-cat", hdfs_path],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+
     def cat_file(self, hdfs_path, head_bytes=None):
         # Improved cat that handles connection errors gracefully
         success, output = self.run_command(["-cat", hdfs_path])
@@ -215,6 +265,16 @@ class HDFSManager:
             
         return summary
     
+    def get_modification_time(self, hdfs_path):
+        """Return the HDFS modification time (ms since epoch) or None if unavailable"""
+        success, output = self.run_command(["-stat", "%Y", hdfs_path])
+        if not success:
+            return None
+        try:
+            return int(output.strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            return None
+    
     def file_exists(self, hdfs_path):
         success, output = self.run_command(["-test", "-e", hdfs_path])
         return success
@@ -37,11 +37,10 @@ class HiveManager:
             # Add USE database statement
             full_query = f"USE {self.database}; {clean_query}"
             
-            # Build command
-            cmd_str = " ".join(self.cmd_prefix) + f' "{full_query}"'
-            
+            # Pass the query as a single argv entry (no shell, no quote escaping)
             result = subprocess.check_output(
-                cmd_str, shell=True, stderr=subprocess.STDOUT, text=True
+                [*self.cmd_prefix, "-e", full_query],
+                stderr=subprocess.STDOUT, text=True
             )
             
             # If requested, try to parse output as DataFrame
@@ -94,7 +93,7 @@ class HiveManager:
     def create_cmapss_tables(self):
         """
         Create optimized external tables for CMAPSS datasets
-        Includes partitioning and proper schema
+        Parquet-backed, partitioned by dataset_id, with proper schema
         """
         results = []
         
@@ -117,8 +116,7 @@ class HiveManager:
         for i in range(1, 22):
             hive_cols.append(f"sensor_{i} DOUBLE")
         
-        # Add metadata columns
-        hive_cols.append("dataset_id STRING")
+        # Add metadata column (dataset_id is the partition column)
         hive_cols.append("dataset_type STRING")
         
         schema_str = ", ".join(hive_cols)
@@ -139,11 +137,9 @@ class HiveManager:
         CREATE EXTERNAL TABLE IF NOT EXISTS cmapss_train (
             {schema_str}
         )
-        ROW FORMAT DELIMITED
-        FIELDS TERMINATED BY ','
-        STORED AS TEXTFILE
-        LOCATION '{HDFS_DIRS['train']}'
-        TBLPROPERTIES ('skip.header.line.count'='0')
+        PARTITIONED BY (dataset_id STRING)
+        STORED AS PARQUET
+        LOCATION '{HDFS_DIRS['parquet_train']}'
         """
         
         success, msg = self.run_query(train_query)
@@ -154,11 +150,9 @@ class HiveManager:
         CREATE EXTERNAL TABLE IF NOT EXISTS cmapss_test (
             {schema_str}
         )
-        ROW FORMAT DELIMITED
-        FIELDS TERMINATED BY ','
-        STORED AS TEXTFILE
-        LOCATION '{HDFS_DIRS['test']}'
-        TBLPROPERTIES ('skip.header.line.count'='0')
+        PARTITIONED BY (dataset_id STRING)
+        STORED AS PARQUET
+        LOCATION '{HDFS_DIRS['parquet_test']}'
         """
         
         success, msg = self.run_query(test_query)
@@ -168,19 +162,21 @@ class HiveManager:
         rul_query = f"""
         CREATE EXTERNAL TABLE IF NOT EXISTS cmapss_rul (
             rul DOUBLE,
-            dataset_id STRING,
             dataset_type STRING
         )
-        ROW FORMAT DELIMITED
-        FIELDS TERMINATED BY ','
-        STORED AS TEXTFILE
-        LOCATION '{HDFS_DIRS['rul']}'
-        TBLPROPERTIES ('skip.header.line.count'='0')
+        PARTITIONED BY (dataset_id STRING)
+        STORED AS PARQUET
+        LOCATION '{HDFS_DIRS['parquet_rul']}'
         """
         
         success, msg = self.run_query(rul_query)
         results.append((success, f"RUL Table: {'Created' if success else msg[:100]}"))
         
+        # Register the dataset_id=... partition directories written by ingestion
+        for table in ("cmapss_train", "cmapss_test", "cmapss_rul"):
+            success, msg = self.run_query(f"MSCK REPAIR TABLE {table}")
+            results.append((success, f"Partitions ({table}): {'Loaded' if success else msg[:100]}"))
+        
         return results
     
     # ==================== PRE-BUILT ANALYTICAL QUERIES ====================
@@ -1,22 +1,60 @@
-
-import subprocess
+import asyncio
 import os
 
-from backend.config import USE_DOCKER, NAMENODE_CONTAINER
+from backend.config import USE_DOCKER, NAMENODE_CONTAINER, MAPREDUCE_CONFIG
 
 class MapReduceManager:
-    def __init__(self):
+    def __init__(self, container_jobs_dir=None):
+        """
+        Args:
+            container_jobs_dir: Directory holding the job scripts inside the namenode
+                (default: the mapreduce_jobs/ bind mount from config)
+        """
         self.jobs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "mapreduce_jobs")
+        self.container_jobs_dir = container_jobs_dir or MAPREDUCE_CONFIG["container_jobs_dir"]
+        # Container paths already confirmed present on the bind mount
+        self._mounted_files = set()
+
+    async def _is_mounted(self, container_path):
+        """Check (once per path) that a file is visible through the jobs bind mount"""
+        if container_path in self._mounted_files:
+            return True
+        proc = await asyncio.create_subprocess_exec(
+            "docker", "exec", NAMENODE_CONTAINER, "test", "-f", container_path,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+        )
+        if await proc.wait() == 0:
+            self._mounted_files.add(container_path)
+            return True
+        return False
 
-    def run_job(self, job_script, input_file, runner="hadoop"):
+    def run_job(self, job_script, input_file, runner="hadoop", extra_jobconf=None):
         """
         Runs a MapReduce job on Hadoop YARN cluster via Docker.
-        All jobs execute on the distributed YARN cluster.
+        Blocking wrapper around run_job_async for synchronous callers.
         
         Args:
             job_script: Name of the MapReduce script to run
             input_file: HDFS path to input file
             runner: Execution mode (always 'hadoop' for YARN cluster)
+            extra_jobconf: Hadoop properties for this job only, overriding mrjob.conf
+        
+        Returns:
+            tuple: (success: bool, output: str)
+        """
+        return asyncio.run(self.run_job_async(job_script, input_file, runner, extra_jobconf))
+
+    async def run_job_async(self, job_script, input_file, runner="hadoop", extra_jobconf=None):
+        """
+        Runs a MapReduce job on Hadoop YARN cluster via Docker.
+        All jobs execute on the distributed YARN cluster; awaiting the job
+        does not block other submissions on the same event loop.
+        
+        Args:
+            job_script: Name of the MapReduce script to run
+            input_file: HDFS path to input file
+            runner: Execution mode (always 'hadoop' for YARN cluster)
+            extra_jobconf: Hadoop properties for this job only, overriding mrjob.conf
         
         Returns:
             tuple: (success: bool, output: str)
@@ -24,22 +62,16 @@ class MapReduceManager:
         if not USE_DOCKER:
             return False, "Docker is required for YARN execution. Please enable USE_DOCKER in config.py"
         
-        script_path = os.path.join(self.jobs_dir, job_script)
-        
         try:
-            # 1. Copy script and config to container
-            container_script_path = f"/tmp/{job_script}"
+            # 1. Scripts and config are bind-mounted into the container (no copy needed)
+            container_script_path = f"{self.container_jobs_dir}/{job_script}"
             config_path = os.path.join(self.jobs_dir, "mrjob.conf")
-            container_config_path = "/tmp/mrjob.conf"
-
-            # Copy script
-            copy_cmd = ["docker", "cp", script_path, f"{NAMENODE_CONTAINER}:{container_script_path}"]
-            subprocess.run(copy_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            container_config_path = f"{self.container_jobs_dir}/mrjob.conf"
 
-            # Copy config
-            if os.path.exists(config_path):
-                copy_conf_cmd = ["docker", "cp", config_path, f"{NAMENODE_CONTAINER}:{container_config_path}"]
-                subprocess.run(copy_conf_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if not await self._is_mounted(container_script_path):
+                return False, (f"{container_script_path} not found in {NAMENODE_CONTAINER}. "
+                               f"Recreate the container so mapreduce_jobs/ is mounted at {self.container_jobs_dir} "
+                               "(docker-compose up -d namenode).")
             
             # 2. Prepare HDFS input path with proper scheme
             input_file = input_file.strip()
@@ -58,11 +90,18 @@ class MapReduceManager:
             if os.path.exists(config_path):
                 cmd.extend(["--conf-path", container_config_path])
             
+            for key, value in (extra_jobconf or {}).items():
+                cmd.extend(["--jobconf", f"{key}={value}"])
+            
             cmd.append(final_input)
             
             # Execute on YARN cluster
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            stdout, stderr = process.communicate()
+            process = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await process.communicate()
+            stdout = stdout.decode("utf-8", errors="replace")
+            stderr = stderr.decode("utf-8", errors="replace")
             
             if process.returncode == 0:
                 return True, stdout
@@ -1,108 +1,615 @@
 import os
+import time
+import queue
+import hashlib
+import shutil
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import joblib
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor
 from sklearn.metrics import mean_squared_error, r2_score
 from backend.hdfs_manager import HDFSManager
-from backend.mongo_manager import MongoManager
-from backend.config import CMAPSS_SCHEMA, BASE_DIR
+from backend.mongo_manager import get_manager
+from backend.config import CMAPSS_SCHEMA, BASE_DIR, ML_CONFIG, VALID_DATASET_IDS, HDFS_DIRS
+
+# Optional: compile trained trees to a native predictor (treelite + tl2cgen)
+try:
+    import treelite
+    import tl2cgen
+except ImportError:
+    treelite = None
+    tl2cgen = None
+
+# Optional: fetch MongoDB results straight into Arrow (pymongoarrow)
+try:
+    from pymongoarrow.api import Schema, find_arrow_all
+except ImportError:
+    find_arrow_all = None
+
+# Optional: JIT-compiled RUL kernel (numba)
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _rul_from_codes(codes, cycles, n_units):
+        """RUL per row from factorized unit codes: two linear passes, no temporaries"""
+        max_cycle = np.zeros(n_units, dtype=cycles.dtype)
+        for i in range(codes.shape[0]):
+            if cycles[i] > max_cycle[codes[i]]:
+                max_cycle[codes[i]] = cycles[i]
+        out = np.empty_like(cycles)
+        for i in range(codes.shape[0]):
+            out[i] = max_cycle[codes[i]] - cycles[i]
+        return out
+else:
+    def _rul_from_codes(codes, cycles, n_units):
+        """RUL per row from factorized unit codes (numpy fallback)"""
+        max_cycle = np.zeros(n_units, dtype=cycles.dtype)
+        np.maximum.at(max_cycle, codes, cycles)
+        return max_cycle[codes] - cycles
+
+# Same schema for the multi-threaded Arrow CSV reader
+HDFS_CSV_ARROW_TYPES = {
+    **{col: pa.float32() for col in CMAPSS_SCHEMA['columns']},
+    'unit_number': pa.int32(),
+    'time_cycles': pa.int32(),
+    'dataset_id': pa.dictionary(pa.int32(), pa.string()),
+    'dataset_type': pa.dictionary(pa.int32(), pa.string()),
+}
+
+# Model inputs (3 settings + 21 sensors), built once as a column indexer
+FEATURE_COLUMNS = pd.Index(ML_CONFIG["feature_columns"])
+
+# Record layout returned by predict_rul
+PREDICTION_DTYPE = np.dtype([
+    ('unit_number', 'i4'),
+    ('time_cycles', 'i4'),
+    ('predicted_rul', 'f4'),
+])
+
+# joblib codec for saved models (needs the lz4 package). Compressed pickles
+# cannot be memory-mapped, so with ML_CONFIG["model_mmap"] models are saved
+# uncompressed instead and their arrays mapped read-only on load.
+MODEL_COMPRESSION = ('lz4', 3)
+MODEL_PICKLE_PROTOCOL = 5
+
+# Processed HDFS CSVs have no header; ingestion appends dataset_id and dataset_type
+HDFS_CSV_COLUMNS = CMAPSS_SCHEMA['columns'] + ['dataset_id', 'dataset_type']
+HDFS_CSV_DTYPES = {
+    **{col: 'float32' for col in CMAPSS_SCHEMA['columns']},
+    'unit_number': 'int32',
+    'time_cycles': 'int32',
+    'dataset_id': 'category',
+    'dataset_type': 'category',
+}
+# Chunked CSV reads: plain string ids, since per-chunk categories differ and
+# concatenating them would silently fall back to object columns
+HDFS_CSV_CHUNK_DTYPES = {**HDFS_CSV_DTYPES, 'dataset_id': str, 'dataset_type': str}
+HDFS_CSV_ID_CATEGORIES = {'dataset_id': 'category', 'dataset_type': 'category'}
+
+# Projection used for MongoDB fetches: the BSON types ingest_data writes (RAW_DTYPES),
+# int32 ids and double readings; a mismatched field type would be read back as nulls
+MONGO_ARROW_SCHEMA = Schema({
+    **{col: pa.float64() for col in CMAPSS_SCHEMA['columns']},
+    'unit_number': pa.int32(),
+    'time_cycles': pa.int32(),
+}) if find_arrow_all is not None else None
+
+class CompiledPredictor:
+    """sklearn-style predict() over a tl2cgen-compiled shared library"""
+
+    def __init__(self, libpath):
+        # Loaded from a uniquely named copy: the dynamic loader reuses an already
+        # loaded library by path, which would keep a replaced .so's old code
+        fd, private_path = tempfile.mkstemp(suffix=".so")
+        os.close(fd)
+        try:
+            shutil.copyfile(libpath, private_path)
+            self.predictor = tl2cgen.Predictor(private_path)
+        finally:
+            os.remove(private_path)  # The mapping outlives the file
+
+    def predict(self, X):
+        dmat = tl2cgen.DMatrix(np.ascontiguousarray(X, dtype=np.float32))
+        return np.asarray(self.predictor.predict(dmat)).reshape(-1)
 
 class ModelService:
     def __init__(self):
         self.hdfs = HDFSManager()
-        self.mongo = MongoManager()
+        self.mongo = get_manager()
         self.models_dir = os.path.join(BASE_DIR, "models")
-        if not os.path.exists(self.models_dir):
-            os.makedirs(self.models_dir)
+        self.cache_dir = ML_CONFIG["hdfs_cache_dir"]
+        # cache_dir lives under models_dir, so one call creates both
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Loaded CompiledPredictor instances: dataset_id -> (model file mtime, predictor)
+        self._compiled_predictors = {}
+        # In-memory caches: dataset_id -> (model file mtime, model) and
+        # (dataset_id, table_type) -> DataFrame (LRU-bounded)
+        self._model_cache = {}
+        self._df_cache = OrderedDict()
+        # Bulk test-set predictions split per unit: dataset_id -> (model mtime, {unit: rows})
+        self._unit_predictions = {}
+        # Last MongoDB connection check, reused for ML_CONFIG["mongo_status_ttl"] seconds
+        self._mongo_ok = None
+        self._mongo_checked_at = 0.0
+
+    def clear_cache(self):
+        """Drops in-memory models and DataFrames (e.g. after re-ingestion)"""
+        self._model_cache.clear()
+        self._df_cache.clear()
+        self._unit_predictions.clear()
+        self._mongo_ok = None
 
-    def _get_data(self, dataset_id, table_type="train"):
+    def _mongo_available(self):
+        """MongoDB connection status, re-checked at most once per TTL"""
+        now = time.monotonic()
+        if self._mongo_ok is None or now - self._mongo_checked_at >= ML_CONFIG["mongo_status_ttl"]:
+            self._mongo_ok, _ = self.mongo.test_connection()
+            self._mongo_checked_at = now
+        return self._mongo_ok
+
+    def _recall_frame(self, dataset_id, table_type):
+        key = (dataset_id, table_type)
+        df = self._df_cache.get(key)
+        if df is not None:
+            self._df_cache.move_to_end(key)
+        return df
+
+    def _remember_frame(self, dataset_id, table_type, df):
+        """Caches a whole frame, sorted by unit once (see _sort_by_unit); returns the cached frame"""
+        df = self._sort_by_unit(df)
+        key = (dataset_id, table_type)
+        self._df_cache[key] = df
+        self._df_cache.move_to_end(key)
+        while len(self._df_cache) > ML_CONFIG["memory_cache_frames"]:
+            self._df_cache.popitem(last=False)
+        return df
+
+    def _cached_unit_predictions(self, dataset_id, model_mtime):
         """
-        Fetches data from MongoDB (preferred) or HDFS.
+        Per-unit predictions from predict_rul_all, if made with the model file
+        whose current mtime is model_mtime (None: no model file)
         """
-        # Try Mongo first
-        conn, _ = self.mongo.test_connection()
-        if conn:
-            print(f"Fetching {table_type} data for {dataset_id} from MongoDB...")
-            try:
-                # Query MongoDB for this dataset_id and type
-                # We expect the ingestion to have stored 'dataset_type' as 'train' or 'test'
-                pipeline = [
-                    {"$match": {"dataset_id": dataset_id, "dataset_type": table_type}},
-                    {"$project": {"_id": 0}} # Exclude Mongo ID
-                ]
+        cached = self._unit_predictions.get(dataset_id)
+        if cached is None or model_mtime is None or cached[0] != model_mtime:
+            return None
+        return cached[1]
+
+    def _load_model(self, dataset_id, model_path):
+        """
+        Returns the model for dataset_id, deserializing only when the .pkl
+        changed since it was last loaded.
+        """
+        mtime = os.path.getmtime(model_path)
+        cached = self._model_cache.get(dataset_id)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        # Prefer the compiled predictor; fall back to the sklearn model
+        model = self._load_compiled(dataset_id, mtime) or joblib.load(
+            model_path, mmap_mode='r' if ML_CONFIG["model_mmap"] else None
+        )
+        self._model_cache[dataset_id] = (mtime, model)
+        return model
+
+    def _get_data(self, dataset_id, table_type="train", unit_number=None, model=None):
+        """
+        Fetches rows from memory, MongoDB (preferred), the local HDFS cache or HDFS,
+        in that order. A requested unit is filtered at each source rather than after
+        a full fetch; whole frames are kept in memory and HDFS files in the local cache.
+        With a model, a CSV-only HDFS file is streamed and predicted as it is read.
+        
+        Returns:
+            tuple: (DataFrame, predictions for its rows, or None when not predicted)
+        """
+        df = self._recall_frame(dataset_id, table_type)
+        if df is not None:
+            return self._select_unit(df, unit_number), None
+        
+        df = self._get_data_from_mongo(dataset_id, table_type, unit_number)
+        if df is None:
+            stats = None
+            if table_type == "train":
+                # Training is followed by a test predict: pull both files in one HDFS read
+                _, _, stats = self._prefetch(dataset_id)
+            hdfs_path, mtime = self._locate_hdfs(dataset_id, table_type, stats)
+            cache_path = self._hdfs_cache_path(hdfs_path, mtime)
+            df = self._read_cache(cache_path, unit_number)
+            if df is None:
+                if model is not None and not hdfs_path.endswith(".parquet"):
+                    # CSV only: stream it, predicting chunks as they arrive
+                    df_all, df, predictions = self._predict_streaming(model, hdfs_path, unit_number)
+                    self._write_cache(cache_path, df_all)
+                    self._remember_frame(dataset_id, table_type, df_all)
+                    return df, predictions
                 
-                # Use aggregate or find. Find is simpler if we just want all records.
-                # However, sorting is important for time series.
+                df_all = self._read_from_hdfs(hdfs_path)
+                self._write_cache(cache_path, df_all)
+                df_all = self._remember_frame(dataset_id, table_type, df_all)
+                return self._select_unit(df_all, unit_number), None
+        
+        # Only whole frames go into the in-memory cache
+        if unit_number is None:
+            df = self._remember_frame(dataset_id, table_type, df)
+        return df, None
+
+    def _get_data_from_mongo(self, dataset_id, table_type, unit_number=None):
+        """
+        Fetches data from MongoDB, or None when Mongo is unavailable or has no rows.
+        """
+        if not self._mongo_available():
+            return None
+
+        print(f"Fetching {table_type} data for {dataset_id} from MongoDB...")
+        try:
+            # Query MongoDB for this dataset_id and type
+            # We expect the ingestion to have stored 'dataset_type' as 'train' or 'test'
+            # Sorting is important for time series.
+            query = {"dataset_id": dataset_id, "dataset_type": table_type}
+            if unit_number is not None:
+                query["unit_number"] = int(unit_number)
+            sort = [("unit_number", 1), ("time_cycles", 1)]
+            
+            if find_arrow_all is not None:
+                # BSON decoded directly into Arrow columns, no per-row dicts
+                table = find_arrow_all(self.mongo.collection, query,
+                                       schema=MONGO_ARROW_SCHEMA, sort=sort)
+                if table.num_rows:
+                    return self._downcast(table.to_pandas(self_destruct=True))
+            else:
                 cursor = self.mongo.collection.find(
-                    {"dataset_id": dataset_id, "dataset_type": table_type},
-                    {"_id": 0}
-                ).sort([("unit_number", 1), ("time_cycles", 1)])
+                    query, {"_id": 0}, batch_size=ML_CONFIG["mongo_fetch_batch_size"]
+                ).sort(sort)
                 
                 data = list(cursor)
                 if data:
-                    return pd.DataFrame(data)
-                else:
-                    print(f"No data found in MongoDB for {dataset_id} ({table_type}). Fallback to HDFS.")
-            except Exception as e:
-                print(f"MongoDB Fetch Error: {e}. Fallback to HDFS.")
+                    return self._downcast(pd.DataFrame(data))
+            print(f"No data found in MongoDB for {dataset_id} ({table_type}). Fallback to HDFS.")
+        except Exception as e:
+            print(f"MongoDB Fetch Error: {e}. Fallback to HDFS.")
+        return None
+
+    def _downcast(self, df):
+        """
+        Applies the HDFS CSV dtypes (float32 readings, int32 ids) to a MongoDB
+        or Parquet result, which arrives as float64/int64.
+        """
+        return df.astype({col: dtype for col, dtype in HDFS_CSV_DTYPES.items() if col in df.columns},
+                         copy=False)
 
-        # Fallback to HDFS
-        hdfs_path = f"/bda_project/processed/{table_type}/{dataset_id}.csv"
-        return self._get_data_from_hdfs(hdfs_path)
+    def _hdfs_path(self, dataset_id, table_type, fmt="parquet"):
+        if fmt == "parquet":
+            return f"{HDFS_DIRS[f'parquet_{table_type}']}/dataset_id={dataset_id}/{dataset_id}.parquet"
+        return f"/bda_project/processed/{table_type}/{dataset_id}.csv"
 
-    def _get_data_from_hdfs(self, hdfs_path):
+    def _locate_hdfs(self, dataset_id, table_type, stats=None):
         """
-        Downloads CSV from HDFS to a temp file and reads it into DataFrame.
+        HDFS file to read for a dataset: the Parquet copy, or the CSV when no
+        Parquet copy exists (data ingested before Parquet uploads).
+        With the stats of a prefetch, the file it located is used without
+        another HDFS stat.
+        
+        Returns:
+            tuple: (hdfs_path, mtime or None when the file cannot be stat'ed)
+        """
+        if stats:
+            for fmt in ("parquet", "csv"):
+                hdfs_path = self._hdfs_path(dataset_id, table_type, fmt)
+                if hdfs_path in stats:
+                    return hdfs_path, stats[hdfs_path][1]
+        for fmt in ("parquet", "csv"):
+            hdfs_path = self._hdfs_path(dataset_id, table_type, fmt)
+            mtime = self.hdfs.get_modification_time(hdfs_path)
+            if mtime is not None:
+                return hdfs_path, mtime
+        return hdfs_path, None
+
+    def _hdfs_cache_path(self, hdfs_path, mtime):
         """
-        filename = os.path.basename(hdfs_path)
-        local_path = os.path.join(self.models_dir, f"temp_{filename}")
+        Local Parquet cache path for an HDFS file, keyed by its path and HDFS mtime.
+        Returns None when the mtime is unknown (cache bypassed).
+        """
+        if mtime is None:
+            return None
+        return self._cache_path_for(hdfs_path, mtime)
+
+    def _cache_path_for(self, hdfs_path, mtime):
+        cache_key = hashlib.sha1(f"{hdfs_path}|{mtime}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{cache_key}.parquet")
+
+    def _read_cache(self, cache_path, unit_number=None):
+        if cache_path is None or not os.path.exists(cache_path):
+            return None
+        os.utime(cache_path)  # Mark as recently used for LRU eviction
+        if unit_number is None:
+            return pd.read_parquet(cache_path)
+        # Predicate applied by the Parquet reader, before a DataFrame is built
+        return pd.read_parquet(cache_path, filters=[("unit_number", "==", int(unit_number))])
+
+    def _write_cache(self, cache_path, df):
+        if cache_path is None:
+            return
+        df.to_parquet(cache_path, index=False)
+        self._evict_cache()
+
+    def prefetch(self, dataset_id):
+        """
+        Warms the local cache with the train and test files of a dataset using
+        one `-stat` and one `-cat` over all missing files, instead of a
+        download round-trip per file. Parquet copies are preferred over CSV.
+        """
+        success, msg, _ = self._prefetch(dataset_id)
+        return success, msg
+
+    def _prefetch(self, dataset_id):
+        """
+        prefetch, also returning the stats it read ({hdfs_path: (size, mtime)},
+        empty when none could be read) for _locate_hdfs to reuse
+        """
+        if dataset_id not in VALID_DATASET_IDS:
+            return False, f"Invalid dataset ID: {dataset_id}", {}
+        
+        for fmt in ("parquet", "csv"):
+            paths = [self._hdfs_path(dataset_id, t, fmt) for t in ("train", "test")]
+            stats = self.hdfs.stat_files(paths)
+            if stats:
+                break
+        else:
+            return False, "Could not stat HDFS files.", {}
         
-        success, msg = self.hdfs.download_file(hdfs_path, local_path)
+        missing = [p for p in paths if not os.path.exists(self._cache_path_for(p, stats[p][1]))]
+        if not missing:
+            return True, "Cache already warm.", stats
+        
+        success, data = self.hdfs.cat_files(missing)
         if not success:
-            raise Exception(f"Failed to download {hdfs_path}: {msg}")
+            return False, f"HDFS cat failed: {data}", stats
+        
+        # Split the concatenated stream back into files using the stat sizes
+        offset = 0
+        for path in missing:
+            size, mtime = stats[path]
+            df = self._parse_hdfs_file(path, pa.BufferReader(data[offset:offset + size]))
+            self._write_cache(self._cache_path_for(path, mtime), df)
+            offset += size
+        return True, f"Prefetched {len(missing)} file(s) for {dataset_id}.", stats
+
+    def _evict_cache(self):
+        """
+        Removes least recently used cache files until the cache fits its size budget.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
         
-        # Read CSV (No header as per our ingestion script)
-        # We need to manually assign column names
-        # Ingestion adds 'dataset_id' at the end.
-        cols = CMAPSS_SCHEMA['columns'] + ['dataset_id']
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= ML_CONFIG["hdfs_cache_max_bytes"]:
+                break
+            os.remove(path)
+            total -= size
+
+    def _read_from_hdfs(self, hdfs_path):
+        """
+        Reads an HDFS file straight into memory (no local temp file). CSVs are
+        streamed into the parser; Parquet needs its footer, so it is read whole.
+        """
+        if hdfs_path.endswith(".parquet"):
+            success, data = self.hdfs.cat_files([hdfs_path])
+            if not success:
+                raise Exception(f"Failed to read {hdfs_path}: {data.strip()}")
+            return self._parse_hdfs_file(hdfs_path, pa.BufferReader(data))
         
-        df = pd.read_csv(local_path, header=None, names=cols)
+        proc = self.hdfs.open_stream(hdfs_path)
+        try:
+            # No header as per our ingestion script
+            df = self._read_hdfs_csv(proc.stdout)
+        except Exception:
+            proc.kill()
+            raise
+        finally:
+            proc.stdout.close()
+            stderr = proc.stderr.read().decode('utf-8', errors='replace')
+            proc.wait()
         
-        if os.path.exists(local_path):
-            os.remove(local_path)
-            
+        if proc.returncode != 0:
+            raise Exception(f"Failed to read {hdfs_path}: {stderr.strip()}")
         return df
 
-    def prepare_training_data(self, df):
+    def _parse_hdfs_file(self, hdfs_path, source):
+        """Parses a processed HDFS file (Parquet or CSV) according to its extension"""
+        if hdfs_path.endswith(".parquet"):
+            return self._read_hdfs_parquet(source)
+        return self._read_hdfs_csv(source)
+
+    def _read_hdfs_parquet(self, source):
         """
-        Calculates RUL for training data.
-        RUL = Max Cycle - Current Cycle (for each unit)
+        Reads only the CMAPSS columns of a processed Parquet file; typed columns
+        need no parsing, then measurements are narrowed to float32.
         """
-        # Calculate max cycle per unit
-        max_cycles = df.groupby('unit_number')['time_cycles'].max().reset_index()
-        max_cycles.columns = ['unit_number', 'max_cycle']
+        table = pq.read_table(source, columns=CMAPSS_SCHEMA['columns'])
+        return self._downcast(table.to_pandas(split_blocks=True, self_destruct=True))
+
+    def _read_hdfs_csv(self, source):
+        """
+        Parses a headerless processed CSV (path or file-like) with Arrow's
+        multi-threaded reader and explicit column types.
+        """
+        table = pacsv.read_csv(
+            source,
+            read_options=pacsv.ReadOptions(column_names=HDFS_CSV_COLUMNS),
+            convert_options=pacsv.ConvertOptions(column_types=HDFS_CSV_ARROW_TYPES),
+        )
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    def _predict_streaming(self, model, hdfs_path, unit_number=None):
+        """
+        Streams the HDFS CSV in chunks and predicts each chunk while the next one
+        is still being read, overlapping HDFS I/O with model inference.
         
-        # Merge back
-        df = df.merge(max_cycles, on='unit_number', how='left')
+        Returns:
+            tuple: (all rows read, rows predicted, predictions)
+        """
+        chunks = queue.Queue(maxsize=2)
+        proc = self.hdfs.open_stream(hdfs_path)
+
+        def reader():
+            try:
+                # pyarrow engine has no chunksize support; C engine with fixed dtypes
+                for chunk in pd.read_csv(proc.stdout, header=None, names=HDFS_CSV_COLUMNS,
+                                         dtype=HDFS_CSV_CHUNK_DTYPES,
+                                         chunksize=ML_CONFIG["predict_chunk_rows"]):
+                    chunks.put(chunk)
+            finally:
+                chunks.put(None)
+
+        raw_frames, frames, predictions = [], [], []
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(reader)
+            try:
+                while (chunk := chunks.get()) is not None:
+                    raw_frames.append(chunk)
+                    if unit_number is not None:
+                        chunk = chunk[chunk['unit_number'] == int(unit_number)]
+                    if not chunk.empty:
+                        frames.append(chunk)
+                        predictions.append(model.predict(self._feature_matrix(chunk)))
+            except Exception:
+                # Stop the reader and drain so it can reach its sentinel
+                proc.kill()
+                while chunks.get() is not None:
+                    pass
+                raise
+            finally:
+                proc.stdout.close()
+                stderr = proc.stderr.read().decode('utf-8', errors='replace')
+                proc.wait()
+            future.result()
+
+        if proc.returncode != 0:
+            raise Exception(f"Failed to read {hdfs_path}: {stderr.strip()}")
+
+        # Ids categorized once on the whole frame, as the other read paths return them
+        df_all = pd.concat(raw_frames, ignore_index=True) if raw_frames else pd.DataFrame(columns=HDFS_CSV_COLUMNS)
+        df_all = df_all.astype(HDFS_CSV_ID_CATEGORIES)
+        if not frames:
+            return df_all, df_all.iloc[0:0], np.empty(0)
+        df_test = pd.concat(frames, ignore_index=True).astype(HDFS_CSV_ID_CATEGORIES)
+        return df_all, df_test, np.concatenate(predictions)
+
+    def _feature_matrix(self, df):
+        """
+        Row-major float32 feature matrix. DataFrame.to_numpy() interleaves
+        column blocks into a Fortran-ordered array, which sklearn would copy.
+        """
+        return np.ascontiguousarray(df[FEATURE_COLUMNS].to_numpy(dtype=np.float32))
+
+    def _sort_by_unit(self, df):
+        """
+        Sorts a frame by unit_number (stable, so cycles keep their order), for
+        binary-search per-unit lookups (see _select_unit). Frames already in
+        unit order are returned as they are.
+        """
+        if df['unit_number'].is_monotonic_increasing:
+            return df
+        return df.sort_values('unit_number', kind='stable', ignore_index=True)
+
+    def _select_unit(self, df, unit_number):
+        """Rows of one unit of a cached frame, or the whole frame when unit_number is None"""
+        if unit_number is None:
+            return df
+        # Frame sorted by unit when cached: two binary searches on the column, then
+        # a row slice. The key takes the column's dtype (a Python int would cast
+        # the whole int32 column to int64 first)
+        units = df['unit_number'].to_numpy()
+        unit = units.dtype.type(int(unit_number))
+        lo, hi = units.searchsorted(unit, 'left'), units.searchsorted(unit, 'right')
+        return df.iloc[lo:hi].reset_index(drop=True)
+
+    def _compile_model(self, model, dataset_id):
+        """
+        Compiles the trained model into a native shared library for fast inference.
+        Best effort: returns a status message and never fails training.
+        """
+        libpath = os.path.join(self.models_dir, f"rul_model_{dataset_id}.so")
+        self._compiled_predictors.pop(dataset_id, None)
+        self._model_cache.pop(dataset_id, None)
+        self._unit_predictions.pop(dataset_id, None)
+        # A library from a previous model must never outlive its .pkl
+        if os.path.exists(libpath):
+            os.remove(libpath)
         
-        # Calculate RUL
-        df['RUL'] = df['max_cycle'] - df['time_cycles']
+        if treelite is None or tl2cgen is None:
+            return "Compiled predictor skipped (treelite/tl2cgen not installed)."
+        try:
+            tl_model = treelite.sklearn.import_model(model)
+            tl2cgen.export_lib(tl_model, toolchain="gcc", libpath=libpath,
+                               params={"parallel_comp": os.cpu_count() or 1})
+            return f"Compiled predictor saved: {libpath}"
+        except Exception as e:
+            return f"Compiled predictor skipped: {e}"
+
+    def _load_compiled(self, dataset_id, model_mtime):
+        """
+        Returns the CompiledPredictor for the .pkl with mtime model_mtime, or None if
+        unavailable. Cached per mtime, so a retrain by another process is picked up.
+        """
+        cached = self._compiled_predictors.get(dataset_id)
+        if cached is not None and cached[0] == model_mtime:
+            return cached[1]
         
-        features = ['op_setting_1', 'op_setting_2', 'op_setting_3'] + \
-                   [f'sensor_{i}' for i in range(1, 22)]
+        libpath = os.path.join(self.models_dir, f"rul_model_{dataset_id}.so")
+        if tl2cgen is None:
+            return None
+        try:
+            lib_mtime = os.path.getmtime(libpath)
+        except FileNotFoundError:
+            return None
+        if lib_mtime < model_mtime:
+            # Library of the previous model, not yet replaced by the retrain
+            return None
+        predictor = CompiledPredictor(libpath)
+        self._compiled_predictors[dataset_id] = (model_mtime, predictor)
+        return predictor
+
+    def prepare_training_data(self, df):
+        """
+        Calculates RUL for training data.
+        RUL = Max Cycle - Current Cycle (for each unit)
+        """
+        # Per-unit max cycle via factorized codes: no groupby frame, no hash join.
+        # Kept off the frame: it may be shared through the in-memory cache
+        codes, uniques = pd.factorize(df['unit_number'], sort=False)
+        rul = _rul_from_codes(codes, df['time_cycles'].to_numpy(), len(uniques))
         
-        X = df[features]
-        y = df['RUL']
+        # float32 features / int32 target halve the bytes scanned per split
+        X = self._feature_matrix(df)
+        y = rul.astype(np.int32)
         
         return X, y
 
     def train_model(self, dataset_id="FD001"):
         """
-        Trains a Random Forest Regressor for a specific dataset ID.
+        Trains a Histogram Gradient Boosting Regressor for a specific dataset ID.
+        Thread count follows OMP_NUM_THREADS.
         """
+        if dataset_id not in VALID_DATASET_IDS:
+            return False, f"Invalid dataset ID: {dataset_id}"
+        
         try:
             print(f"Fetching training data for {dataset_id}...")
-            df = self._get_data(dataset_id, "train")
+            df, _ = self._get_data(dataset_id, "train")
             
             if df.empty:
                 return False, "Dataframe is empty."
@@ -110,16 +617,22 @@ class ModelService:
             print("Preparing training data...")
             X, y = self.prepare_training_data(df)
             
-            print(f"Training Random Forest for {dataset_id}...")
-            model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+            print(f"Training Histogram Gradient Boosting for {dataset_id}...")
+            model = HistGradientBoostingRegressor(
+                random_state=ML_CONFIG["random_state"],
+                **ML_CONFIG["algorithms"]["hist_gradient_boosting"]
+            )
             model.fit(X, y)
             
-            # Save model
+            # Save model (LZ4 by default; uncompressed when it will be memory-mapped)
             model_path = os.path.join(self.models_dir, f"rul_model_{dataset_id}.pkl")
-            joblib.dump(model, model_path)
+            compress = 0 if ML_CONFIG["model_mmap"] else MODEL_COMPRESSION
+            joblib.dump(model, model_path, compress=compress, protocol=MODEL_PICKLE_PROTOCOL)
             
             print(f"Model saved to {model_path}")
-            return True, f"Model trained and saved: {model_path}"
+            compile_msg = self._compile_model(model, dataset_id)
+            print(compile_msg)
+            return True, f"Model trained and saved: {model_path}. {compile_msg}"
             
         except Exception as e:
             return False, str(e)
@@ -128,39 +641,83 @@ class ModelService:
         """
         Runs prediction on the Test set for a specific Dataset ID.
         If unit_number is provided, returns prediction series for that unit.
+        
+        Returns:
+            tuple: (numpy structured array of PREDICTION_DTYPE or None, message)
         """
+        if dataset_id not in VALID_DATASET_IDS:
+            return None, f"Invalid dataset ID: {dataset_id}"
+        
         try:
-            # Load model
+            # Load model (a missing file surfaces from _load_model's stat; no exists() check)
             model_path = os.path.join(self.models_dir, f"rul_model_{dataset_id}.pkl")
-            if not os.path.exists(model_path):
+            try:
+                model = self._load_model(dataset_id, model_path)
+            except FileNotFoundError:
                 return None, "Model not found. Please train first."
             
-            model = joblib.load(model_path)
+            unit = int(unit_number) if unit_number is not None else None
             
-            # Load Test Data
-            df_test = self._get_data(dataset_id, "test")
+            # Per-unit request after a bulk predict_rul_all: just index into it
+            # (_load_model has just stat'ed the model file, so its cached mtime is current)
+            by_unit = (self._cached_unit_predictions(dataset_id, self._model_cache[dataset_id][0])
+                       if unit is not None else None)
+            if by_unit is not None:
+                if unit not in by_unit:
+                    return None, "No test data found."
+                return by_unit[unit], "Success"
             
-            if unit_number:
-                df_test = df_test[df_test['unit_number'] == int(unit_number)]
+            # Load Test Data (see _get_data); a CSV-only test set comes back already predicted
+            df_test, predictions = self._get_data(dataset_id, "test", unit, model=model)
             
             if df_test.empty:
                 return None, "No test data found."
             
-            features = ['op_setting_1', 'op_setting_2', 'op_setting_3'] + \
-                       [f'sensor_{i}' for i in range(1, 22)]
-                       
-            X_test = df_test[features]
-            predictions = model.predict(X_test)
-            
-            # Attach predictions
-            df_test['predicted_rul'] = predictions
+            if predictions is None:
+                X_test = self._feature_matrix(df_test)
+                predictions = model.predict(X_test)
             
-            # Return result
-            return df_test[['unit_number', 'time_cycles', 'predicted_rul']], "Success"
+            # Return a structured array built straight from the column buffers
+            result = np.empty(len(predictions), dtype=PREDICTION_DTYPE)
+            result['unit_number'] = df_test['unit_number'].to_numpy()
+            result['time_cycles'] = df_test['time_cycles'].to_numpy()
+            result['predicted_rul'] = predictions
+            return result, "Success"
             
         except Exception as e:
             return None, str(e)
 
+    def predict_rul_all(self, dataset_id):
+        """
+        Predicts the whole Test set once and splits the result per engine unit.
+        Later predict_rul(dataset_id, unit_number) calls are served from it
+        until the model is retrained.
+        
+        Returns:
+            tuple: (dict {unit_number: structured array of PREDICTION_DTYPE} or None, message)
+        """
+        # Stat the model file: a retrain by another process invalidates the split
+        model_path = os.path.join(self.models_dir, f"rul_model_{dataset_id}.pkl")
+        try:
+            model_mtime = os.path.getmtime(model_path)
+        except OSError:
+            model_mtime = None
+        by_unit = self._cached_unit_predictions(dataset_id, model_mtime)
+        if by_unit is not None:
+            return by_unit, "Success"
+        
+        result, msg = self.predict_rul(dataset_id)
+        if result is None:
+            return None, msg
+        
+        # One stable sort, then split at unit boundaries (rows keep cycle order)
+        ordered = result[np.argsort(result['unit_number'], kind='stable')]
+        units, starts = np.unique(ordered['unit_number'], return_index=True)
+        by_unit = dict(zip(units.tolist(), np.split(ordered, starts[1:])))
+        
+        self._unit_predictions[dataset_id] = (self._model_cache[dataset_id][0], by_unit)
+        return by_unit, "Success"
+
 if __name__ == "__main__":
     ms = ModelService()
     # Manual test trigger if run directly
@@ -4,16 +4,137 @@ Handles all MongoDB operations including CRUD, aggregations, and analytics
 Optimized for big data storage with proper indexing and batch operations
 """
 
+import functools
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import pymongo
-from pymongo import ASCENDING, DESCENDING
-from pymongo.errors import BulkWriteError, PyMongoError
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.write_concern import WriteConcern
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, PyMongoError
+
+# Optional: move data between MongoDB and Arrow/pandas columns directly (pymongoarrow)
+try:
+    from pymongoarrow.api import find_pandas_all, write as write_arrow
+except ImportError:
+    find_pandas_all = None
+    write_arrow = None
+
 from backend.config import (
     MONGO_URI, DB_NAME, COLLECTION_NAME, CMAPSS_SCHEMA,
-    MONGO_INDEXES, MONGO_BATCH_SIZE, DATASET_METADATA, CRITICAL_SENSORS
+    MONGO_INDEXES, MONGO_NATURAL_KEY, MONGO_DATASET_INDEX, MONGO_TRENDS_INDEX, MONGO_BATCH_SIZE, MONGO_CURSOR_BATCH_SIZE, MONGO_QUERY_CACHE,
+    MONGO_INGEST_CHUNK_ROWS, MONGO_INGEST_WRITE_CONCERN, MONGO_INSERT_WORKERS, MONGO_POOL_OPTIONS,
+    DATASET_METADATA, CRITICAL_SENSORS
 )
 
 
+SENSOR_FIELDS = [f"sensor_{i}" for i in range(1, 22)]
+
+# Raw file dtypes: integer ids, readings kept float64 (stored as BSON doubles;
+# a float32 round-trip would persist values like 0.0023000000510364771)
+RAW_DTYPES = {
+    **{col: 'float64' for col in CMAPSS_SCHEMA['columns']},
+    'unit_number': 'int32',
+    'time_cycles': 'int32',
+}
+
+
+def _sensor_stats_group(sensors):
+    """$group stage with min/max/avg/std for each sensor"""
+    group_stage = {"_id": None}
+    for sensor in sensors:
+        group_stage[f"{sensor}_min"] = {"$min": f"${sensor}"}
+        group_stage[f"{sensor}_max"] = {"$max": f"${sensor}"}
+        group_stage[f"{sensor}_avg"] = {"$avg": f"${sensor}"}
+        group_stage[f"{sensor}_std"] = {"$stdDevPop": f"${sensor}"}
+    return group_stage
+
+
+# Pipeline stages that never change, built once at import (not per dashboard refresh)
+_AVG_GROUP_STAGE = {
+    "_id": "$unit_number",
+    "max_cycle": {"$max": "$time_cycles"},
+    **{f"avg_{sensor}": {"$avg": f"${sensor}"} for sensor in SENSOR_FIELDS}
+}
+_AVG_PROJECT_STAGE = {
+    "unit_number": "$_id",
+    "max_life": "$max_cycle",
+    **{f"avg_{sensor}": f"$avg_{sensor}" for sensor in SENSOR_FIELDS},
+    "_id": 0
+}
+_ALL_SENSOR_STATS_GROUP = _sensor_stats_group(SENSOR_FIELDS)
+
+# createIndexes error codes for an index already present on the same keys with other
+# options (IndexOptionsConflict, IndexKeySpecsConflict)
+_INDEX_CONFLICT_CODES = (85, 86)
+
+# Aggregations precomputed per (dataset_id, dataset_type) into cmapss_<name>_<id>_<type>
+MATERIALIZED_AGGREGATIONS = ("unit_averages", "health_scores", "failure_features", "condition_metrics")
+
+
+# Small documents derived from the readings (the precomputed summary), one per _id
+METADATA_COLLECTION = "_metadata"
+
+
+def _frame_records(frame):
+    """
+    Rows of a DataFrame as documents. Each column is unboxed once with tolist()
+    (native int/float/str, which BSON encodes directly) and the dicts are zipped
+    from those lists, skipping to_dict('records')'s per-cell type dispatch.
+    """
+    cols = list(frame.columns)
+    return [dict(zip(cols, row)) for row in zip(*(frame[col].tolist() for col in cols))]
+
+
+def _cached_query(method):
+    """
+    Memoizes a read-only dashboard query per arguments for MONGO_QUERY_CACHE['ttl']
+    seconds (LRU-bounded). Write methods clear the cache via _invalidates_queries.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.collection is None:
+            return method(self, *args, **kwargs)
+        
+        freeze = lambda v: tuple(v) if isinstance(v, list) else v
+        key = (method.__name__, tuple(map(freeze, args)),
+               tuple(sorted((k, freeze(v)) for k, v in kwargs.items())))
+        now = time.monotonic()
+        with self._query_cache_lock:
+            hit = self._query_cache.get(key)
+            if hit is not None and now - hit[0] < MONGO_QUERY_CACHE['ttl']:
+                self._query_cache.move_to_end(key)
+                return hit[1]
+        
+        result = method(self, *args, **kwargs)
+        with self._query_cache_lock:
+            self._query_cache[key] = (now, result)
+            self._query_cache.move_to_end(key)
+            while len(self._query_cache) > MONGO_QUERY_CACHE['maxsize']:
+                self._query_cache.popitem(last=False)
+        return result
+    return wrapper
+
+
+def _invalidates_queries(method):
+    """
+    Clears the query cache and the stored summary once a write method has run
+    (even if it failed midway)
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.clear_query_cache()
+            self._invalidate_summary()
+    return wrapper
+
+
 class MongoManager:
     """Manages MongoDB operations for CMAPSS turbofan engine data"""
     
@@ -21,12 +142,20 @@ class MongoManager:
         self.client = None
         self.db = None
         self.collection = None
+        # Dashboard query results: key -> (time cached, result); see _cached_query
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = threading.Lock()
         self.connect()
     
+    def clear_query_cache(self):
+        """Drop all cached query results"""
+        with self._query_cache_lock:
+            self._query_cache.clear()
+    
     def connect(self):
         """Establish connection to MongoDB and create indexes"""
         try:
-            self.client = pymongo.MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+            self.client = _shared_client()
             self.db = self.client[DB_NAME]
             self.collection = self.db[COLLECTION_NAME]
             
@@ -50,6 +179,29 @@ class MongoManager:
             # Create compound indexes defined in config
             for index_fields in MONGO_INDEXES:
                 self.collection.create_index(index_fields, background=True)
+            # Natural key: unique, so ingestion upserts can never duplicate a reading.
+            # Partial: RUL rows carry no time_cycles and stay out of the index
+            # (otherwise they would all collide on a null key)
+            natural_key = [(key, 1) for key in MONGO_NATURAL_KEY]
+            unique_options = dict(
+                unique=True, background=True,
+                partialFilterExpression={key: {'$exists': True} for key in MONGO_NATURAL_KEY},
+            )
+            try:
+                try:
+                    self.collection.create_index(natural_key, **unique_options)
+                except OperationFailure as e:
+                    if e.code not in _INDEX_CONFLICT_CODES:
+                        raise
+                    # Same keys indexed earlier with other options: rebuild it as unique
+                    self.collection.drop_index(natural_key)
+                    self.collection.create_index(natural_key, **unique_options)
+            except DuplicateKeyError as e:
+                # Duplicate readings already stored: keep a plain index for the
+                # queries, but upserts are no longer protected against duplicates
+                self.collection.create_index(natural_key, background=True)
+                print(f"MongoDB ERROR: unique natural-key index not built, duplicate readings "
+                      f"exist (re-ingest with full_reload=True to fix): {e}")
             print("MongoDB indexes created successfully")
         except Exception as e:
             print(f"Index creation warning: {e}")
@@ -60,20 +212,24 @@ class MongoManager:
             return False, "Client not initialized."
         try:
             self.client.server_info()
-            count = self.collection.count_documents({})
+            # Collection metadata count: O(1), no collection scan
+            count = self.collection.estimated_document_count()
             return True, f"Connected successfully. Total documents: {count:,}"
         except Exception as e:
             return False, str(e)
     
     # ==================== CREATE OPERATIONS ====================
     
-    def ingest_data(self, data, batch_size=None):
+    @_invalidates_queries
+    def ingest_data(self, data, batch_size=None, full_reload=False):
         """
         Ingest CMAPSS dataset into MongoDB with batch processing
         
         Args:
             data: Either filepath (str) or pandas DataFrame
             batch_size: Number of records per batch (default from config)
+            full_reload: Drop the whole collection first (see reset_collection); rows are
+                then plain-inserted and the indexes built once after the load
         
         Returns:
             tuple: (success, message)
@@ -85,53 +241,116 @@ class MongoManager:
             batch_size = MONGO_BATCH_SIZE
         
         try:
-            df = None
-            
-            # Load data
+            # Load data: files are parsed in chunks so writes start before the whole file is read
             if isinstance(data, str):
                 cols = CMAPSS_SCHEMA['columns']
-                df = pd.read_csv(data, sep=r'\s+', header=None, names=cols, engine='python')
+                frames = pd.read_csv(data, sep=r'\s+', header=None, names=cols, engine='c',
+                                     dtype=RAW_DTYPES, na_filter=False,
+                                     chunksize=MONGO_INGEST_CHUNK_ROWS)
             elif isinstance(data, pd.DataFrame):
-                df = data
+                frames = iter([data])
             else:
                 return False, "Unsupported data type for ingestion."
             
-            # Remove existing data for this dataset to avoid duplicates
-            if 'dataset_id' in df.columns:
-                dataset_ids = df['dataset_id'].unique()
-                if 'dataset_type' in df.columns:
-                    dataset_types = df['dataset_type'].unique()
-                    for ds_id in dataset_ids:
-                        for ds_type in dataset_types:
-                            self.collection.delete_many({
-                                'dataset_id': ds_id,
-                                'dataset_type': ds_type
-                            })
-                else:
-                    self.collection.delete_many({'dataset_id': {'$in': list(dataset_ids)}})
+            first = next(frames, None)
+            if first is None or first.empty:
+                return False, "No records to ingest."
             
-            # Convert to records
-            records = df.to_dict('records')
+            if full_reload:
+                # No indexes during the load: one build per index at the end instead
+                # of a B-tree update per inserted document
+                self.collection.drop()
+                # Aggregations of datasets not in this load must not outlive it
+                self.drop_materialized()
             
-            if not records:
-                return False, "No records to ingest."
+            # Rows carrying the full natural key are upserted on it: re-runs are
+            # idempotent, with no delete phase and no window of missing data.
+            # After a full reload the collection is empty, so they are just inserted.
+            keyed = all(key in first.columns for key in MONGO_NATURAL_KEY)
+            upsert = keyed and not full_reload
+            if not keyed and not full_reload and 'dataset_id' in first.columns:
+                # Unkeyed rows (RUL labels) have nothing to upsert on: replace the
+                # dataset's existing rows so re-runs do not duplicate them
+                delete_filter = {'dataset_id': {'$in': first['dataset_id'].unique().tolist()}}
+                if 'dataset_type' in first.columns:
+                    delete_filter['dataset_type'] = {'$in': first['dataset_type'].unique().tolist()}
+                self.collection.delete_many(delete_filter)
+            target = self.collection.with_options(
+                write_concern=WriteConcern(**MONGO_INGEST_WRITE_CONCERN)
+            )
             
-            # Batch insertion for better performance
-            inserted_count = 0
-            for i in range(0, len(records), batch_size):
-                batch = records[i:i + batch_size]
+            # Batches are sent concurrently over the client's connection pool so server acks overlap
+            def write_batch(batch):
                 try:
-                    result = self.collection.insert_many(batch, ordered=False)
-                    inserted_count += len(result.inserted_ids)
+                    if upsert:
+                        ops = [UpdateOne({key: r[key] for key in MONGO_NATURAL_KEY}, {'$set': r}, upsert=True)
+                               for r in batch]
+                        result = target.bulk_write(ops, ordered=False, bypass_document_validation=True)
+                        return result.upserted_count + result.matched_count
+                    result = target.insert_many(batch, ordered=False, bypass_document_validation=True)
+                    return len(result.inserted_ids)
                 except BulkWriteError as bwe:
-                    # Some records inserted, some failed
-                    inserted_count += bwe.details['nInserted']
+                    # Some records written, some failed
+                    details = bwe.details
+                    return details.get('nInserted', 0) + details.get('nUpserted', 0) + details.get('nMatched', 0)
+            
+            inserted_count = 0
+            datasets = set()
+            try:
+                with ThreadPoolExecutor(max_workers=MONGO_INSERT_WORKERS) as pool:
+                    pending = []
+                    for frame in itertools.chain([first], frames):
+                        # Stored types are what readers declare (MONGO_ARROW_SCHEMA in
+                        # model_service): int32 ids, double readings even when a column
+                        # parsed as integers
+                        frame = frame.astype({col: dtype for col, dtype in RAW_DTYPES.items()
+                                              if col in frame.columns}, copy=False)
+                        if keyed:
+                            datasets.update(frame[['dataset_id', 'dataset_type']].drop_duplicates()
+                                            .itertuples(index=False, name=None))
+                        if not upsert and write_arrow is not None:
+                            # Plain inserts: columns encoded to BSON without building per-row dicts
+                            write_arrow(target, frame)
+                            inserted_count += len(frame)
+                            continue
+                        
+                        # The next chunk was parsed while the previous one was being written;
+                        # collect those writes before queueing more (at most two chunks in memory)
+                        inserted_count += sum(f.result() for f in pending)
+                        records = _frame_records(frame)
+                        pending = [pool.submit(write_batch, records[i:i + batch_size])
+                                   for i in range(0, len(records), batch_size)]
+                    inserted_count += sum(f.result() for f in pending)
+            finally:
+                if full_reload:
+                    # Restore the indexes even if the load failed midway
+                    self._create_indexes()
+            
+            # Precompute the dashboard aggregations of the datasets just written
+            for dataset_id, dataset_type in datasets:
+                try:
+                    self.refresh_materialized(dataset_id, dataset_type)
+                except PyMongoError as e:
+                    print(f"Materialized aggregation warning ({dataset_id}/{dataset_type}): {e}")
             
             return True, f"Successfully ingested {inserted_count:,} records in batches of {batch_size}."
             
         except Exception as e:
             return False, f"Ingestion Error: {str(e)}"
     
+    def reset_collection(self):
+        """
+        Empties the collection by dropping it and recreating its indexes: O(1)
+        and frees storage immediately, unlike delete_many({}) which removes
+        (and logs) every document one by one.
+        """
+        self.collection.drop()
+        self.drop_materialized()
+        self.collection = self.db[COLLECTION_NAME]
+        self._create_indexes()
+        self.clear_query_cache()
+        self._invalidate_summary()
+    
     # ==================== READ OPERATIONS ====================
     
     def get_dataset(self, dataset_id, dataset_type=None, unit_number=None, limit=None):
@@ -145,26 +364,57 @@ class MongoManager:
             limit: Maximum records to return (optional)
         
         Returns:
-            list: Records matching criteria
+            list: Records matching criteria (see iter_dataset to stream them)
         """
-        if self.collection is None:
-            return []
+        return list(self.iter_dataset(dataset_id, dataset_type, unit_number, limit))
+    
+    def iter_dataset(self, dataset_id, dataset_type=None, unit_number=None, limit=None):
+        """
+        Streams the records of get_dataset from a cursor: documents are fetched
+        in batches as they are iterated. Single pass; the server cursor stays
+        open until it is exhausted or closed.
         
-        query = {'dataset_id': dataset_id}
-        if dataset_type:
-            query['dataset_type'] = dataset_type
-        if unit_number:
-            query['unit_number'] = int(unit_number)
+        Returns:
+            iterable: pymongo Cursor (an empty iterator when not connected)
+        """
+        if self.collection is None:
+            return iter(())
         
-        cursor = self.collection.find(query, {'_id': 0}).sort([
+        cursor = self.collection.find(self._dataset_query(dataset_id, dataset_type, unit_number),
+                                      {'_id': 0}).sort([
             ('unit_number', ASCENDING),
             ('time_cycles', ASCENDING)
-        ])
+        ]).batch_size(MONGO_CURSOR_BATCH_SIZE)
         
         if limit:
             cursor = cursor.limit(limit)
         
-        return list(cursor)
+        return cursor
+    
+    def get_dataset_df(self, dataset_id, dataset_type=None, unit_number=None):
+        """
+        Retrieve dataset as a DataFrame (same filters as get_dataset).
+        With pymongoarrow installed, BSON is decoded straight into columns.
+        
+        Returns:
+            pd.DataFrame: Records matching criteria, sorted by unit and cycle
+        """
+        if self.collection is None:
+            return pd.DataFrame()
+        
+        query = self._dataset_query(dataset_id, dataset_type, unit_number)
+        sort = [('unit_number', ASCENDING), ('time_cycles', ASCENDING)]
+        if find_pandas_all is not None:
+            return find_pandas_all(self.collection, query, projection={'_id': 0}, sort=sort)
+        return pd.DataFrame(list(self.iter_dataset(dataset_id, dataset_type, unit_number)))
+    
+    def _dataset_query(self, dataset_id, dataset_type=None, unit_number=None):
+        query = {'dataset_id': dataset_id}
+        if dataset_type:
+            query['dataset_type'] = dataset_type
+        if unit_number:
+            query['unit_number'] = int(unit_number)
+        return query
 
     def get_sample_documents(self, dataset_id="FD001", dataset_type="train", limit=5):
         """
@@ -180,36 +430,66 @@ class MongoManager:
         
         return list(cursor)
     
+    @_cached_query
     def get_summary(self):
-        """Get overall database summary statistics"""
+        """
+        Get overall database summary statistics
+        Read from the stored summary document; computed (and stored) only after
+        the data changed (see _invalidates_queries)
+        """
         if self.collection is None:
             return {"status": "Not Connected"}
         
-        count = self.collection.count_documents({})
-        if count == 0:
+        metadata = self.db[METADATA_COLLECTION]
+        summary = metadata.find_one({'_id': 'summary'}, {'_id': 0})
+        if summary is not None:
+            return summary
+        
+        summary = self._compute_summary()
+        if "status" not in summary:
+            metadata.replace_one({'_id': 'summary'}, dict(summary), upsert=True)
+        return summary
+    
+    def _invalidate_summary(self):
+        """Drops the stored summary so the next get_summary recomputes it"""
+        if self.db is None:
+            return
+        try:
+            self.db[METADATA_COLLECTION].delete_one({'_id': 'summary'})
+        except PyMongoError as e:
+            print(f"Summary invalidation warning: {e}")
+    
+    def _compute_summary(self):
+        """Summary statistics over the whole collection"""
+        if self.collection.estimated_document_count() == 0:
             return {"status": "No Data", "total_records": 0}
         
+        # One grouped pass yields the per-dataset counts, ids, types and units
+        groups = list(self.collection.aggregate([
+            {"$group": {
+                "_id": {"dataset_id": "$dataset_id", "dataset_type": "$dataset_type"},
+                "count": {"$sum": 1},
+                "units": {"$addToSet": "$unit_number"}
+            }}
+        ]))
+        
+        counts = {(g['_id'].get('dataset_id'), g['_id'].get('dataset_type')): g['count'] for g in groups}
+        dataset_ids = sorted({ds_id for ds_id, _ in counts if ds_id is not None})
         summary = {
-            "total_records": count,
-            "total_units": len(self.collection.distinct('unit_number')),
-            "dataset_ids": list(self.collection.distinct('dataset_id')),
-            "dataset_types": list(self.collection.distinct('dataset_type')),
+            "total_records": sum(counts.values()),
+            "total_units": len(set().union(*(g['units'] for g in groups))),
+            "dataset_ids": dataset_ids,
+            "dataset_types": sorted({ds_type for _, ds_type in counts if ds_type is not None}),
             "data_type": "C-MAPSS Multivariate Time Series"
         }
         
         # Add per-dataset breakdown
         dataset_breakdown = {}
-        for ds_id in summary['dataset_ids']:
+        for ds_id in dataset_ids:
             metadata = DATASET_METADATA.get(ds_id, {})
             dataset_breakdown[ds_id] = {
-                "train_count": self.collection.count_documents({
-                    'dataset_id': ds_id, 
-                    'dataset_type': 'train'
-                }),
-                "test_count": self.collection.count_documents({
-                    'dataset_id': ds_id, 
-                    'dataset_type': 'test'
-                }),
+                "train_count": counts.get((ds_id, 'train'), 0),
+                "test_count": counts.get((ds_id, 'test'), 0),
                 "description": metadata.get('description', 'N/A'),
                 "conditions": metadata.get('operating_conditions', 'N/A'),
                 "faults": metadata.get('fault_modes', 'N/A')
@@ -218,24 +498,33 @@ class MongoManager:
         summary['datasets'] = dataset_breakdown
         return summary
     
-    def get_sensor_trends(self, unit_id, dataset_id="FD001", dataset_type="train"):
-        """Get time-series sensor data for a specific engine unit"""
+    def get_sensor_trends(self, unit_id, dataset_id="FD001", dataset_type="train", sensors=None):
+        """
+        Get time-series sensor data for a specific engine unit
+        
+        Only time_cycles and the requested sensors (default: all 21) are
+        returned; ids and operational settings stay on the server.
+        """
         if self.collection is None:
             return []
         
+        projection = {'_id': 0, 'time_cycles': 1, **{s: 1 for s in (sensors or SENSOR_FIELDS)}}
         cursor = self.collection.find(
             {
                 'unit_number': int(unit_id), 
                 'dataset_id': dataset_id,
                 'dataset_type': dataset_type
             }, 
-            {'_id': 0}
-        ).sort('time_cycles', ASCENDING)
+            projection
+        ).sort('time_cycles', ASCENDING).hint(
+            MONGO_TRENDS_INDEX  # sorted by the index walk; dataset_type checked on fetch
+        ).batch_size(MONGO_CURSOR_BATCH_SIZE)  # a unit's whole history in one batch
         
         return list(cursor)
     
     # ==================== UPDATE OPERATIONS ====================
     
+    @_invalidates_queries
     def update_sensor_data(self, dataset_id, unit_number, time_cycle, updates):
         """
         Update specific sensor readings
@@ -263,6 +552,8 @@ class MongoManager:
             )
             
             if result.matched_count > 0:
+                # The stored aggregations no longer match; recompute on next read
+                self.drop_materialized(dataset_id)
                 return True, f"Updated {result.modified_count} record(s)"
             else:
                 return False, "No matching record found"
@@ -272,6 +563,7 @@ class MongoManager:
     
     # ==================== DELETE OPERATIONS ====================
     
+    @_invalidates_queries
     def delete_dataset(self, dataset_id, dataset_type=None):
         """
         Delete entire dataset or specific type (train/test)
@@ -292,6 +584,7 @@ class MongoManager:
                 query['dataset_type'] = dataset_type
             
             result = self.collection.delete_many(query)
+            self.drop_materialized(dataset_id, dataset_type)
             return True, f"Deleted {result.deleted_count:,} records"
             
         except Exception as e:
@@ -299,46 +592,91 @@ class MongoManager:
     
     # ==================== ADVANCED AGGREGATION PIPELINES ====================
     
-    def get_avg_sensors_per_unit(self, dataset_id="FD001", dataset_type="train"):
-        """Calculate average sensor values per engine unit"""
+    def _aggregate_heavy(self, pipeline):
+        """
+        Runs a full-dataset aggregation that may exceed the in-memory stage limit:
+        allowed to spill to disk, and pinned to MONGO_DATASET_INDEX so the
+        dataset_id + dataset_type $match is always an index scan.
+        """
+        return list(self.collection.aggregate(
+            pipeline, allowDiskUse=True, hint=MONGO_DATASET_INDEX
+        ))
+    
+    def _materialized(self, name, dataset_id, dataset_type, pipeline, sort, refresh=False):
+        """
+        Serves an aggregation from its precomputed collection
+        cmapss_<name>_<dataset_id>_<dataset_type> (an O(units) find instead of an
+        O(rows) aggregation). The pipeline is run and written there with $out
+        when refresh is set (after ingestion/updates) or nothing is stored yet.
+        """
+        view = self.db[f"cmapss_{name}_{dataset_id}_{dataset_type}"]
+        if not refresh:
+            docs = list(view.find({}, {'_id': 0}).sort(sort))
+            if docs:
+                return docs
+        
+        self.collection.aggregate(
+            pipeline + [{"$out": view.name}],
+            allowDiskUse=True, hint=MONGO_DATASET_INDEX
+        )
+        return list(view.find({}, {'_id': 0}).sort(sort))
+    
+    def refresh_materialized(self, dataset_id, dataset_type):
+        """Recomputes every materialized aggregation of one dataset"""
+        self.get_avg_sensors_per_unit(dataset_id, dataset_type, refresh=True)
+        self.get_unit_health_scores(dataset_id, dataset_type, refresh=True)
+        self.get_failure_prediction_features(dataset_id, dataset_type, refresh=True)
+        self.get_condition_based_metrics(dataset_id, dataset_type, refresh=True)
+    
+    def drop_materialized(self, dataset_id=None, dataset_type=None):
+        """
+        Removes the materialized aggregations of a dataset (one or both types),
+        or of every dataset when dataset_id is None
+        """
+        if dataset_id is None:
+            prefixes = "|".join(MATERIALIZED_AGGREGATIONS)
+            names = self.db.list_collection_names(filter={'name': {'$regex': f"^cmapss_({prefixes})_"}})
+            for name in names:
+                self.db.drop_collection(name)
+            return
+        for ds_type in ([dataset_type] if dataset_type else ["train", "test"]):
+            for name in MATERIALIZED_AGGREGATIONS:
+                self.db.drop_collection(f"cmapss_{name}_{dataset_id}_{ds_type}")
+    
+    @_cached_query
+    def get_avg_sensors_per_unit(self, dataset_id="FD001", dataset_type="train", refresh=False):
+        """
+        Calculate average sensor values per engine unit
+        Served from its materialized collection (see _materialized)
+        """
         if self.collection is None:
             return []
         
-        # Build aggregation for all sensors
-        group_stage = {
-            "_id": "$unit_number",
-            "max_cycle": {"$max": "$time_cycles"}
-        }
-        
-        # Add averages for all sensors
-        for i in range(1, 22):
-            sensor_name = f"sensor_{i}"
-            group_stage[f"avg_{sensor_name}"] = {"$avg": f"${sensor_name}"}
-        
         pipeline = [
             {"$match": {"dataset_id": dataset_id, "dataset_type": dataset_type}},
-            {"$group": group_stage},
+            {"$group": _AVG_GROUP_STAGE},
             {"$sort": {"_id": ASCENDING}},
-            {"$project": {
-                "unit_number": "$_id",
-                "max_life": "$max_cycle",
-                **{f"avg_sensor_{i}": f"$avg_sensor_{i}" for i in range(1, 22)},
-                "_id": 0
-            }}
+            {"$project": _AVG_PROJECT_STAGE}
         ]
         
-        return list(self.collection.aggregate(pipeline))
+        return self._materialized("unit_averages", dataset_id, dataset_type, pipeline,
+                                  [("unit_number", ASCENDING)], refresh)
     
-    def get_unit_health_scores(self, dataset_id="FD001", dataset_type="train"):
+    @_cached_query
+    def get_unit_health_scores(self, dataset_id="FD001", dataset_type="train", refresh=False):
         """
         Calculate comprehensive health scores for each engine unit
         Uses multiple sensor indicators to compute overall health index
+        Served from its materialized collection (see _materialized)
         """
         if self.collection is None:
             return []
         
         pipeline = [
             {"$match": {"dataset_id": dataset_id, "dataset_type": dataset_type}},
+            # Only the fields the $group reads move through the pipeline
+            {"$project": {"unit_number": 1, "time_cycles": 1, "sensor_2": 1, "sensor_3": 1,
+                          "sensor_8": 1, "sensor_9": 1, "sensor_11": 1, "_id": 0}},
             {"$group": {
                 "_id": "$unit_number",
                 "max_life": {"$max": "$time_cycles"},
@@ -367,8 +705,10 @@ class MongoManager:
             {"$sort": {"max_life": ASCENDING}}
         ]
         
-        return list(self.collection.aggregate(pipeline))
+        return self._materialized("health_scores", dataset_id, dataset_type, pipeline,
+                                  [("max_life", ASCENDING)], refresh)
     
+    @_cached_query
     def get_sensor_statistics(self, dataset_id="FD001", dataset_type="train", sensors=None):
         """
         Calculate comprehensive statistics for specified sensors
@@ -385,16 +725,8 @@ class MongoManager:
         if self.collection is None:
             return {}
         
-        if sensors is None:
-            sensors = [f"sensor_{i}" for i in range(1, 22)]
-        
-        # Build group stage with statistics for each sensor
-        group_stage = {"_id": None}
-        for sensor in sensors:
-            group_stage[f"{sensor}_min"] = {"$min": f"${sensor}"}
-            group_stage[f"{sensor}_max"] = {"$max": f"${sensor}"}
-            group_stage[f"{sensor}_avg"] = {"$avg": f"${sensor}"}
-            group_stage[f"{sensor}_std"] = {"$stdDevPop": f"${sensor}"}
+        # Group stage with statistics for each sensor (prebuilt for all sensors)
+        group_stage = _ALL_SENSOR_STATS_GROUP if sensors is None else _sensor_stats_group(sensors)
         
         pipeline = [
             {"$match": {"dataset_id": dataset_id, "dataset_type": dataset_type}},
@@ -404,6 +736,63 @@ class MongoManager:
         result = list(self.collection.aggregate(pipeline))
         return result[0] if result else {}
     
+    @_cached_query
+    def get_sensor_correlations(self, dataset_id="FD001", dataset_type="train", sensors=None,
+                                per_unit=False):
+        """
+        Pearson correlation matrix between sensors. A single $group sums each
+        sensor and each pairwise product server-side; the covariances and
+        correlations are derived here (only the sensors x sensors sums leave MongoDB).
+        Readings are shifted by one stored reading first, so the sums stay
+        small and E[ab] - E[a]E[b] does not cancel away the variance.
+        
+        Args:
+            per_unit: Correlate the per-unit sensor averages (as plotted from
+                      get_avg_sensors_per_unit) instead of the raw readings
+        
+        Returns:
+            pd.DataFrame: Correlation matrix indexed by sensor name (NaN for constant sensors)
+        """
+        if self.collection is None:
+            return pd.DataFrame()
+        
+        sensors = list(sensors or SENSOR_FIELDS)
+        match = {"dataset_id": dataset_id, "dataset_type": dataset_type}
+        sample = self.collection.find_one(match, {"_id": 0, **{a: 1 for a in sensors}})
+        if sample is None:
+            return pd.DataFrame()
+        shift = {a: sample.get(a) or 0.0 for a in sensors}
+        
+        pipeline = [{"$match": match}]
+        if per_unit:
+            pipeline.append({"$group": {"_id": "$unit_number",
+                                        **{a: {"$avg": f"${a}"} for a in sensors}}})
+        pipeline.append({"$project": {"_id": 0, **{a: {"$subtract": [f"${a}", shift[a]]}
+                                                   for a in sensors}}})
+        group_stage = {"_id": None, "count": {"$sum": 1}}
+        for i, a in enumerate(sensors):
+            group_stage[f"sum_{a}"] = {"$sum": f"${a}"}
+            for b in sensors[i:]:
+                group_stage[f"sum_{a}_{b}"] = {"$sum": {"$multiply": [f"${a}", f"${b}"]}}
+        pipeline.append({"$group": group_stage})
+        
+        result = self._aggregate_heavy(pipeline)
+        if not result:
+            return pd.DataFrame()
+        
+        stats = result[0]
+        n = stats["count"]
+        mean = pd.Series({a: stats[f"sum_{a}"] / n for a in sensors})
+        cov = pd.DataFrame(index=sensors, columns=sensors, dtype=float)
+        for i, a in enumerate(sensors):
+            for b in sensors[i:]:
+                cov.loc[a, b] = cov.loc[b, a] = stats[f"sum_{a}_{b}"] / n - mean[a] * mean[b]
+        # Constant sensors have (up to rounding) zero spread: leave their correlations undefined
+        var = pd.Series([cov.loc[a, a] for a in sensors], index=sensors)
+        scale = ((mean + pd.Series(shift)) ** 2).clip(lower=1.0)
+        std = var.where(var > 1e-12 * scale) ** 0.5
+        return cov.div(std, axis=0).div(std, axis=1).clip(-1.0, 1.0)
+    
     def get_degradation_trends(self, dataset_id="FD001", dataset_type="train", 
                                window_size=None, sensors=None):
         """
@@ -412,7 +801,8 @@ class MongoManager:
         Args:
             dataset_id: Dataset identifier
             dataset_type: 'train' or 'test'
-            window_size: Unused (kept for compatibility)
+            window_size: Optional number of cycles for a server-side rolling
+                         average, returned as '<sensor>_rollavg' fields
             sensors: List of sensors to analyze (default: all sensors)
         
         Returns:
@@ -423,7 +813,7 @@ class MongoManager:
         
         if sensors is None:
             # Analyze all sensors 1-21
-            sensors = [f"sensor_{i}" for i in range(1, 22)]
+            sensors = SENSOR_FIELDS
         
         # Calculate average value for each sensor at each time cycle across all units
         group_stage = {
@@ -446,19 +836,35 @@ class MongoManager:
             }}
         ]
         
-        return list(self.collection.aggregate(pipeline))
+        if window_size:
+            # Rolling means computed by the server over the per-cycle averages (MongoDB 5.0+)
+            pipeline.append({"$setWindowFields": {
+                "sortBy": {"time_cycles": ASCENDING},
+                "output": {
+                    f"{sensor}_rollavg": {
+                        "$avg": f"${sensor}",
+                        "window": {"documents": [-(int(window_size) - 1), 0]}
+                    }
+                    for sensor in sensors
+                }
+            }})
+        
+        return self._aggregate_heavy(pipeline)
     
-    def get_failure_prediction_features(self, dataset_id="FD001", dataset_type="train"):
+    def get_failure_prediction_features(self, dataset_id="FD001", dataset_type="train", refresh=False):
         """
         Extract aggregated features useful for RUL prediction
         Includes rolling statistics and sensor interactions
+        Served from its materialized collection (see _materialized)
         """
         if self.collection is None:
             return []
         
         pipeline = [
             {"$match": {"dataset_id": dataset_id, "dataset_type": dataset_type}},
-            {"$sort": {"unit_number": ASCENDING, "time_cycles": ASCENDING}},
+            # Only the fields the $group reads move through the pipeline
+            {"$project": {"unit_number": 1, "time_cycles": 1, "sensor_2": 1, "sensor_3": 1,
+                          "sensor_8": 1, "sensor_9": 1, "sensor_10": 1, "sensor_12": 1, "_id": 0}},
             {"$group": {
                 "_id": "$unit_number",
                 "total_cycles": {"$max": "$time_cycles"},
@@ -500,12 +906,14 @@ class MongoManager:
             {"$sort": {"unit_number": ASCENDING}}
         ]
         
-        return list(self.collection.aggregate(pipeline))
+        return self._materialized("failure_features", dataset_id, dataset_type, pipeline,
+                                  [("unit_number", ASCENDING)], refresh)
     
-    def get_condition_based_metrics(self, dataset_id="FD002", dataset_type="train"):
+    def get_condition_based_metrics(self, dataset_id="FD002", dataset_type="train", refresh=False):
         """
         Analyze performance metrics grouped by operational conditions
         Useful for datasets with multiple operating conditions (FD002, FD004)
+        Served from its materialized collection (see _materialized)
         """
         if self.collection is None:
             return []
@@ -550,7 +958,41 @@ class MongoManager:
             {"$sort": {"unique_engines": DESCENDING}}
         ]
         
-        return list(self.collection.aggregate(pipeline))
+        return self._materialized("condition_metrics", dataset_id, dataset_type, pipeline,
+                                  [("unique_engines", DESCENDING)], refresh)
+
+
+_INSTANCE = None
+_INSTANCE_LOCK = threading.Lock()
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def _shared_client():
+    """
+    MongoClient shared by every MongoManager in the process: one set of monitor
+    threads and one warm connection pool, however many managers are created.
+    Never closed by a manager.
+    """
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = pymongo.MongoClient(
+                MONGO_URI, serverSelectionTimeoutMS=5000, retryWrites=True, **MONGO_POOL_OPTIONS
+            )
+        return _CLIENT
+
+
+def get_manager():
+    """
+    Shared MongoManager for the process, so every service reuses one client
+    connection pool instead of opening its own.
+    """
+    global _INSTANCE
+    with _INSTANCE_LOCK:
+        if _INSTANCE is None:
+            _INSTANCE = MongoManager()
+        return _INSTANCE
 
 
 if __name__ == "__main__":
@@ -0,0 +1,38 @@
+"""
+pytest fixtures shared by the test scripts
+- yarn_cluster: YARN MapReduce smoke tests (test_yarn_mr.py, test_yarn_mapreduce.py);
+  the cluster probe and job-file staging run once per pytest session
+- scratch_manager: MongoDB tests (test_mongo_indexes.py, test_mongo_arrow.py,
+  test_mongo_correlations.py), on an empty scratch collection so the ingested
+  sensors collection is untouched
+"""
+import pytest
+
+from yarn_helpers import prepare_yarn_cluster
+
+SCRATCH_COLLECTION = "sensors_test"
+
+
+@pytest.fixture(scope="session")
+def yarn_cluster():
+    cluster = prepare_yarn_cluster()
+    if cluster is None:
+        pytest.skip("YARN not ready: no running NodeManager (is the cluster up?)")
+    return cluster
+
+
+@pytest.fixture
+def scratch_manager():
+    pytest.importorskip("pymongo")
+    from backend.mongo_manager import MongoManager
+
+    mm = MongoManager()
+    connected, msg = mm.test_connection()
+    if not connected:
+        pytest.skip(f"MongoDB not reachable: {msg}")
+
+    mm.collection = mm.db[SCRATCH_COLLECTION]
+    mm.collection.drop()
+    mm._create_indexes()
+    yield mm
+    mm.collection.drop()
@@ -0,0 +1,23 @@
+"""
+Base class of the CMAPSS MapReduce jobs: protocols and input format shared by every job
+"""
+from mrjob.job import MRJob
+from mrjob.protocol import JSONProtocol, PickleProtocol
+
+
+class CMAPSSJob(MRJob):
+    """
+    Pickle between steps (no JSON encode/parse per record) and JSON for the final
+    output. Small input files are packed into shared splits, capped by
+    split.maxsize in mrjob.conf. Subclasses extend JOBCONF rather than replace it.
+    """
+
+    INTERNAL_PROTOCOL = PickleProtocol
+    OUTPUT_PROTOCOL = JSONProtocol
+    HADOOP_INPUT_FORMAT = 'org.apache.hadoop.mapred.lib.CombineTextInputFormat'
+    # Streaming drops the byte-offset key only for TextInputFormat itself: without
+    # this every mapper line would arrive as "<offset>\t<line>"
+    JOBCONF = {'stream.map.input.ignoreKey': 'true'}
+    # Shipped next to each job script so the tasks can import this module
+    # (relative paths resolve against the job script's directory)
+    FILES = ['cmapss_job.py']
@@ -16,12 +16,12 @@ except ImportError:
     pipes.quote = shlex.quote
     sys.modules["pipes"] = pipes
 
-from mrjob.job import MRJob
+from cmapss_job import CMAPSSJob
 from mrjob.step import MRStep
 import re
 
 
-class MRCycleCounter(MRJob):
+class MRCycleCounter(CMAPSSJob):
     """
     MapReduce job to count cycles per engine unit
     Useful for identifying engines with unusual operational lifespans
@@ -39,13 +39,13 @@ class MRCycleCounter(MRJob):
             return
         
         try:
-            # Parse data - handle both space-separated (raw CMAPSS) and comma-separated
-            # Using split() without argument handles any whitespace
+            # Parse data - handle both space-separated (raw CMAPSS) and comma-separated.
+            # Only the first two fields are used: stop splitting after them
             if ',' in line:
-                parts = line.strip().split(',')
+                parts = line.strip().split(',', 2)
             else:
                 # Space-separated (original CMAPSS format)
-                parts = line.strip().split()
+                parts = line.split(None, 2)
             
             if len(parts) < 2:
                 return
@@ -61,6 +61,13 @@ class MRCycleCounter(MRJob):
             # Skip malformed lines
             pass
     
+    def combiner_max_cycles(self, unit_number, cycles):
+        """
+        Combine phase: Per-mapper maximum cycle for each unit
+        (max is associative, so the shuffle carries one record per unit per mapper)
+        """
+        yield (unit_number, max(cycles))
+    
     def reducer_max_cycles(self, unit_number, cycles):
         """
         Reduce phase: Find maximum cycle for each unit
@@ -92,6 +99,7 @@ class MRCycleCounter(MRJob):
         return [
             MRStep(
                 mapper=self.mapper,
+                combiner=self.combiner_max_cycles,
                 reducer=self.reducer_max_cycles
             )
         ]
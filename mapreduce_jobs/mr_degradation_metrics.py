@@ -16,17 +16,23 @@ except ImportError:
     pipes.quote = shlex.quote
     sys.modules["pipes"] = pipes
 
-from mrjob.job import MRJob
+from cmapss_job import CMAPSSJob
 from mrjob.step import MRStep
+import heapq
 import json
 
 
-class MRDegradationMetrics(MRJob):
+class MRDegradationMetrics(CMAPSSJob):
     """
     MapReduce job to calculate degradation metrics for engines
     Focuses on critical sensors that indicate wear and degradation
     """
     
+    # Per-unit windows are the heaviest reduce: run 3 reducers (AM + 3 task containers fit
+    # on the NodeManager). Output spans 3 part files in no global order; mrjob streams
+    # them all and readers parse each line on its own
+    JOBCONF = dict(CMAPSSJob.JOBCONF, **{'mapreduce.job.reduces': 3})
+    
     # Critical sensors for degradation analysis
     CRITICAL_SENSOR_INDICES = {
         'temp_hpc': 4,      # sensor_3 (HPC outlet temp) - index 5 in CSV
@@ -35,39 +41,41 @@ class MRDegradationMetrics(MRJob):
         'core_speed': 10,    # sensor_9 (Physical core speed) - index 12
         'fuel_ratio': 13     # sensor_12 (Fuel flow ratio) - index 14
     }
+    # Fields needed per line (the mapper stops splitting after them)
+    MIN_FIELDS = 15
+    # Largest early/late window compared per unit
+    WINDOW = 10
     
     def mapper(self, _, line):
         """
         Map phase: Extract unit data with cycle and critical sensors
         
         Input: CSV line
-        Output: (unit_number, cycle_data)
+        Output: (unit_number, (cycle, *sensor values in CRITICAL_SENSOR_INDICES order))
         """
         if not line or not line.strip():
             return
         
         try:
-            parts = line.strip().split(',')
+            parts = line.strip().split(',', self.MIN_FIELDS - 1)
             
-            if len(parts) < 15:
+            if len(parts) < self.MIN_FIELDS:
                 return
             
             unit_number = int(float(parts[0]))
             time_cycles = int(float(parts[1]))
             
-            # Extract critical sensor values
-            sensor_data = {}
-            for name, idx in self.CRITICAL_SENSOR_INDICES.items():
+            # Extract critical sensor values into a fixed-layout tuple
+            # (no per-record key strings to allocate, serialize or look up)
+            record = [time_cycles]
+            for idx in self.CRITICAL_SENSOR_INDICES.values():
                 try:
-                    sensor_data[name] = float(parts[idx])
+                    record.append(float(parts[idx]))
                 except (ValueError, IndexError):
-                    sensor_data[name] = 0.0
+                    record.append(0.0)
             
-            # Emit: unit -> (cycle, sensor_data)
-            yield (unit_number, {
-                'cycle': time_cycles,
-                **sensor_data
-            })
+            # Emit: unit -> (cycle, sensor values...)
+            yield (unit_number, tuple(record))
             
         except (ValueError, IndexError):
             pass
@@ -76,18 +84,36 @@ class MRDegradationMetrics(MRJob):
         """
         Reducer: Calculate degradation metrics per unit
         
-        Input: (unit_number, [cycle_data1, cycle_data2, ...])
+        Input: (unit_number, [(cycle, sensor values...), ...])
         Output: (unit_number, degradation_metrics)
         """
-        # Collect all cycle data and sort by cycle
-        all_data = sorted(list(cycle_data_list), key=lambda x: x['cycle'])
+        # One streaming pass keeping only the WINDOW lowest and highest cycles
+        # (O(WINDOW) memory per unit instead of buffering and sorting its lifespan)
+        lowest = []   # max-heap via negated cycle
+        highest = []  # min-heap
+        n = 0
+        for n, data in enumerate(cycle_data_list, start=1):
+            cycle = data[0]
+            if len(lowest) < self.WINDOW:
+                heapq.heappush(lowest, (-cycle, n, data))
+            elif -cycle > lowest[0][0]:
+                heapq.heapreplace(lowest, (-cycle, n, data))
+            if len(highest) < self.WINDOW:
+                heapq.heappush(highest, (cycle, n, data))
+            elif cycle > highest[0][0]:
+                heapq.heapreplace(highest, (cycle, n, data))
         
-        if len(all_data) < 2:
+        if n < 2:
             return
         
+        lowest = [data for _, _, data in sorted(lowest, key=lambda x: (-x[0], x[1]))]
+        highest = [data for _, _, data in sorted(highest)]
+        
         # Get early and late cycle data for comparison
-        early_window = all_data[:min(10, len(all_data) // 4)]
-        late_window = all_data[-min(10, len(all_data) // 4):]
+        # (a window of 0 keeps the whole lifespan as the late window, as slicing [-0:] did)
+        window = min(self.WINDOW, n // 4)
+        early_window = lowest[:window]
+        late_window = highest[-window:]
         
         # Calculate averages
         def avg_sensors(window):
@@ -96,9 +122,8 @@ class MRDegradationMetrics(MRJob):
                 return {}
             
             avgs = {}
-            for sensor in self.CRITICAL_SENSOR_INDICES.keys():
-                avg = sum(d.get(sensor, 0) for d in window) / n
-                avgs[sensor] = avg
+            for pos, sensor in enumerate(self.CRITICAL_SENSOR_INDICES, start=1):
+                avgs[sensor] = sum(d[pos] for d in window) / n
             return avgs
         
         early_avg = avg_sensors(early_window)
@@ -128,7 +153,7 @@ class MRDegradationMetrics(MRJob):
         
         result = {
             'unit': unit_number,
-            'total_cycles': all_data[-1]['cycle'],
+            'total_cycles': highest[-1][0],
             'degradation': degradation,
             'health_index': round(health_index, 2),
             'early_avg_temp': round(early_avg.get('temp_hpc', 0), 2),
@@ -15,23 +15,32 @@ except ImportError:
     pipes.quote = shlex.quote
     sys.modules["pipes"] = pipes
 
-from mrjob.job import MRJob
+from cmapss_job import CMAPSSJob
 from mrjob.step import MRStep
 import json
 
 
-class MRFeatureSummary(MRJob):
+class MRFeatureSummary(CMAPSSJob):
     """
     MapReduce job to calculate min, max, mean, variance for all features
     Provides comprehensive statistical summary of the dataset
     """
     
+    # Features in CSV order from index 2 (after unit_number, time_cycles)
+    FEATURE_NAMES = ['op_setting_1', 'op_setting_2', 'op_setting_3'] + \
+                    ['sensor_{}'.format(i) for i in range(1, 22)]
+    
+    def mapper_init(self):
+        """Per-mapper Welford state per feature: [count, mean, m2, min, max]"""
+        self.acc = {name: [0, 0.0, 0.0, float('inf'), float('-inf')]
+                    for name in self.FEATURE_NAMES}
+    
     def mapper(self, _, line):
         """
-        Map phase: Extract all feature values
+        Map phase: Fold all feature values into the mapper's accumulators
+        (in-mapper combining: nothing is emitted per line)
         
         Input: CSV line with engine data
-        Output: (feature_name, value)
         """
         if not line or not line.strip():
             return
@@ -43,74 +52,66 @@ class MRFeatureSummary(MRJob):
             if len(parts) < 26:
                 return
             
-            # Skip unit_number (index 0) and time_cycles (index 1)
-            # Process operational settings (indices 2-4)
-            feature_names = ['op_setting_1', 'op_setting_2', 'op_setting_3'] + \
-                          ['sensor_{}'.format(i) for i in range(1, 22)]
-            
-            for idx, feature_name in enumerate(feature_names, start=2):
-                if idx < len(parts):
-                    try:
-                        value = float(parts[idx])
-                        yield (feature_name, value)
-                    except ValueError:
-                        pass
+            # Skip unit_number (index 0) and time_cycles (index 1); the 24
+            # features are indices 2-25, all present after the length check
+            acc = self.acc
+            to_float = float
+            for feature_name, raw in zip(self.FEATURE_NAMES, parts[2:26]):
+                try:
+                    value = to_float(raw)
+                except ValueError:
+                    continue
+                state = acc[feature_name]
+                state[0] += 1
+                delta = value - state[1]
+                state[1] += delta / state[0]
+                state[2] += delta * (value - state[1])
+                if value < state[3]:
+                    state[3] = value
+                if value > state[4]:
+                    state[4] = value
                         
         except (ValueError, IndexError):
             pass
     
-    def combiner(self, feature, values):
+    def mapper_final(self):
         """
-        Combiner: Pre-aggregate statistics locally
+        Emit one partial per feature for the whole input split
         
-        Input: (feature_name, [value1, value2, ...])
-        Output: (feature_name, {count, sum, min, max, sum_sq})
+        Output: (feature_name, (count, mean, m2, min, max))
         """
-        values_list = list(values)
-        
-        if not values_list:
-            return
-        
-        count = len(values_list)
-        total = sum(values_list)
-        min_val = min(values_list)
-        max_val = max(values_list)
-        sum_squares = sum(v * v for v in values_list)
-        
-        yield (feature, {
-            'count': count,
-            'sum': total,
-            'min': min_val,
-            'max': max_val,
-            'sum_sq': sum_squares
-        })
+        for feature_name, state in self.acc.items():
+            if state[0]:
+                yield (feature_name, tuple(state))
     
-    def reducer(self, feature, stats_dicts):
+    def reducer(self, feature, partials):
         """
         Reducer: Aggregate all statistics
         
-        Input: (feature_name, [{stats1}, {stats2}, ...])
+        Input: (feature_name, [(count, mean, m2, min, max), ...])
         Output: (feature_name, complete_statistics)
         """
-        # Aggregate statistics from all mappers
+        # Merge partial (count, mean, m2) states pairwise (Chan et al.): numerically
+        # stable, unlike E[X^2] - E[X]^2 which cancels for large means/small spreads
         total_count = 0
-        total_sum = 0
+        mean = 0.0
+        m2 = 0.0
         global_min = float('inf')
         global_max = float('-inf')
-        total_sum_sq = 0
-        
-        for stats in stats_dicts:
-            total_count += stats['count']
-            total_sum += stats['sum']
-            global_min = min(global_min, stats['min'])
-            global_max = max(global_max, stats['max'])
-            total_sum_sq += stats['sum_sq']
         
-        # Calculate final statistics
-        mean = total_sum / total_count if total_count > 0 else 0
+        for count_b, mean_b, m2_b, min_b, max_b in partials:
+            if count_b == 0:
+                continue
+            delta = mean_b - mean
+            count = total_count + count_b
+            mean += delta * count_b / count
+            m2 += m2_b + delta * delta * total_count * count_b / count
+            total_count = count
+            global_min = min(global_min, min_b)
+            global_max = max(global_max, max_b)
         
-        # Variance: E[X^2] - E[X]^2
-        variance = (total_sum_sq / total_count - mean * mean) if total_count > 0 else 0
+        # Calculate final statistics (population variance)
+        variance = m2 / total_count if total_count > 0 else 0
         std_dev = variance ** 0.5
         
         result = {
@@ -126,11 +127,12 @@ class MRFeatureSummary(MRJob):
         yield (feature, json.dumps(result))
     
     def steps(self):
-        """Define MapReduce steps with combiner"""
+        """Define MapReduce steps with in-mapper combining"""
         return [
             MRStep(
+                mapper_init=self.mapper_init,
                 mapper=self.mapper,
-                combiner=self.combiner,
+                mapper_final=self.mapper_final,
                 reducer=self.reducer
             )
         ]
@@ -7,22 +7,23 @@ except ImportError:
     import shlex
     sys.modules['pipes'] = shlex
 
-from mrjob.job import MRJob
+from cmapss_job import CMAPSSJob
 
 
-class MROpCount(MRJob):
+class MROpCount(CMAPSSJob):
     """
     Counts the number of records per Unit Number.
     Input: CMaps text file
     """
-
+    
     def mapper(self, _, line):
         try:
+            # Only the unit number (first field) is used
             line = line.strip()
             if ',' in line:
-                parts = line.split(',')
+                parts = line.split(',', 1)
             else:
-                parts = line.split()
+                parts = line.split(None, 1)
             
             if len(parts) > 0:
                 unit_id = parts[0]
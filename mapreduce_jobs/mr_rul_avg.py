@@ -7,9 +7,9 @@ except ImportError:
     import shlex
     sys.modules['pipes'] = shlex
 
-from mrjob.job import MRJob
+from cmapss_job import CMAPSSJob
 
-class MRRulAvg(MRJob):
+class MRRulAvg(CMAPSSJob):
     """
     Calculates the Average RUL (Remaining Useful Life) for each Operational Setting 1 cluster.
     This assumes input is training data where RUL is implicit (Max Cycle - Current Cycle).
@@ -24,14 +24,15 @@ class MRRulAvg(MRJob):
     
     For this task, let's calculate Average Sensor 4 (Temp) per Rounded Op Setting 1.
     """
-
+    
     def mapper(self, _, line):
         try:
+            # Split the 26 C-MAPSS fields only (not trailing metadata columns)
             line = line.strip()
             if ',' in line:
-                parts = line.split(',')
+                parts = line.split(',', 25)
             else:
-                parts = line.split()
+                parts = line.split(None, 25)
             
             # Check length to ensure it's a valid data line
             # 26 columns in standard C-MAPSS
@@ -7,44 +7,71 @@ except ImportError:
     import shlex
     sys.modules['pipes'] = shlex
 
-from mrjob.job import MRJob
+from cmapss_job import CMAPSSJob
 from mrjob.step import MRStep
 import statistics
 
-class MRSensorStats(MRJob):
+class MRSensorStats(CMAPSSJob):
     """
     Calculates Min, Max, and Average for Sensor 11 across all units.
     Sensor 11 is 'Static Pressure'
     Input: Space-separated text file (CMaps)
     """
-
+    
     def mapper(self, _, line):
         # Format: Unit Time Op1 Op2 Op3 S1 ... S21
         # Handle both CSV (new) and Space-separated (old)
         try:
+            # Split the 26 C-MAPSS fields only (not trailing metadata columns)
             if ',' in line:
-                parts = line.strip().split(',')
+                parts = line.strip().split(',', 25)
             else:
-                parts = line.split()
+                parts = line.split(None, 25)
                 
             if len(parts) >= 26:
                 # Sensor 11 is at index 5 + 10 = 15 (0-indexed)
                 # S1 is index 5
                 # S11 is index 15
                 sensor_11_val = float(parts[15])
-                yield "Sensor_11", sensor_11_val
+                # Partial state (count, sum, min, max) of a single reading
+                yield "Sensor_11", (1, sensor_11_val, sensor_11_val, sensor_11_val)
         except Exception:
             pass
 
-    def reducer(self, key, values):
-        vals = list(values)
-        if vals:
+    def _fold(self, partials):
+        """Merges (count, sum, min, max) partials in one pass, O(1) memory"""
+        n, total, mn, mx = 0, 0.0, float('inf'), float('-inf')
+        for p_n, p_sum, p_min, p_max in partials:
+            n += p_n
+            total += p_sum
+            if p_min < mn:
+                mn = p_min
+            if p_max > mx:
+                mx = p_max
+        return n, total, mn, mx
+
+    def combiner(self, key, partials):
+        """Collapses each mapper's readings to one partial before the shuffle"""
+        yield key, self._fold(partials)
+
+    def reducer(self, key, partials):
+        n, total, mn, mx = self._fold(partials)
+        if n:
             yield key, {
-                "min": min(vals),
-                "max": max(vals),
-                "avg": sum(vals) / len(vals),
-                "count": len(vals)
+                "min": mn,
+                "max": mx,
+                "avg": total / n,
+                "count": n
             }
 
+    def steps(self):
+        return [
+            MRStep(
+                mapper=self.mapper,
+                combiner=self.combiner,
+                reducer=self.reducer
+            )
+        ]
+
 if __name__ == '__main__':
     MRSensorStats.run()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Runs both YARN MapReduce smoke tests at once (test_yarn_mapreduce.py, test_yarn_mr.py)
+The jobs share no data and mrjob gives every run its own HDFS output directory,
+so YARN schedules them side by side; the suite fails if either job fails or
+its output differs from the local copy of the input.
+"""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from yarn_helpers import prepare_yarn_cluster
+from test_yarn_mapreduce import expected_max_cycles, parse_max_cycles, run_yarn_execution
+from test_yarn_mr import expected_sensor_stats, run_yarn_mapreduce
+
+
+def run_suite():
+    cluster = prepare_yarn_cluster()
+    if cluster is None:
+        print("❌ YARN NOT READY: no running NodeManager (is the cluster up?)")
+        return False
+    
+    # Each worker only waits on its docker/YARN job, so threads are enough
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        cycle_counter = pool.submit(run_yarn_execution, cluster)
+        sensor_stats = pool.submit(run_yarn_mapreduce, cluster)
+        cc_success, cc_output = cycle_counter.result()
+        ss_success, _, stats = sensor_stats.result()
+    
+    expected = expected_sensor_stats()
+    results = {
+        "mr_cycle_counter": cc_success and parse_max_cycles(cc_output) == expected_max_cycles(),
+        "mr_sensor_stats": ss_success and stats is not None
+                           and {k: stats[k] for k in expected} == expected,
+    }
+    
+    print("\n" + "=" * 60)
+    for job, ok in results.items():
+        print(f"{'✅' if ok else '❌'} {job}")
+    return all(results.values())
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_suite() else 1)
@@ -0,0 +1,40 @@
+"""
+Correlation test against a live MongoDB (skipped when none is reachable): the
+server-side sums of get_sensor_correlations must give pandas' .corr() matrix.
+"""
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from backend.config import CMAPS_DIR, CMAPSS_SCHEMA
+
+SENSORS = ["sensor_2", "sensor_3", "sensor_4", "sensor_7", "sensor_11", "sensor_14"]
+# Same value on every reading of FD001
+CONSTANT_SENSOR = "sensor_1"
+
+
+@pytest.fixture
+def readings(scratch_manager):
+    frame = pd.read_csv(os.path.join(CMAPS_DIR, "train_FD001.txt"), sep=r"\s+", header=None,
+                        names=CMAPSS_SCHEMA["columns"])
+    frame = frame[frame["unit_number"] <= 10]
+    scratch_manager.collection.insert_many(
+        frame.assign(dataset_id="FD001", dataset_type="train").to_dict("records")
+    )
+    return frame
+
+
+@pytest.mark.parametrize("per_unit", [False, True])
+def test_sensor_correlations_match_pandas(scratch_manager, readings, per_unit):
+    corr = scratch_manager.get_sensor_correlations("FD001", "train", sensors=SENSORS, per_unit=per_unit)
+    rows = readings.groupby("unit_number")[SENSORS].mean() if per_unit else readings[SENSORS]
+    expected = rows.corr()
+    assert (corr - expected).abs().max().max() < 1e-9
+
+
+def test_constant_sensor_correlation_is_undefined(scratch_manager, readings):
+    corr = scratch_manager.get_sensor_correlations("FD001", "train", sensors=SENSORS + [CONSTANT_SENSOR])
+    assert corr[CONSTANT_SENSOR].isna().all()
+    assert corr.loc[SENSORS, SENSORS].notna().all().all()
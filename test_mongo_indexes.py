@@ -0,0 +1,88 @@
+"""
+Index tests against a live MongoDB (skipped when none is reachable): the hinted
+dataset reads must keep working next to the partial natural-key index.
+"""
+import pytest
+
+from backend.config import MONGO_TRENDS_INDEX
+
+
+@pytest.fixture
+def manager(scratch_manager):
+    scratch_manager.collection.insert_many(
+        [{'dataset_id': 'FD001', 'dataset_type': 'train', 'unit_number': unit,
+          'time_cycles': cycle, 'sensor_2': 640.0 + cycle}
+         for unit in (1, 2) for cycle in (3, 1, 2)]
+        # RUL labels carry no time_cycles: outside the partial unique index
+        + [{'dataset_id': 'FD001', 'dataset_type': 'rul', 'unit_number': unit, 'rul': 100 + unit}
+           for unit in (1, 2)]
+    )
+    yield scratch_manager
+    scratch_manager.db.drop_collection("cmapss_index_test_FD001_train")
+
+
+def test_natural_key_index_is_partial_and_unique(manager):
+    natural_key = [
+        index for index in manager.collection.list_indexes()
+        if list(index['key']) == ['dataset_id', 'dataset_type', 'unit_number', 'time_cycles']
+    ]
+    assert len(natural_key) == 1
+    assert natural_key[0].get('unique')
+    assert 'partialFilterExpression' in natural_key[0]
+    # Both RUL rows were stored despite sharing a null time_cycles
+    assert manager.collection.count_documents({'dataset_type': 'rul'}) == 2
+
+
+def test_sensor_trends_hint(manager):
+    trends = manager.get_sensor_trends(1, "FD001", "train", sensors=["sensor_2"])
+    assert [doc['time_cycles'] for doc in trends] == [1, 2, 3]
+
+
+def test_duplicate_readings_keep_a_plain_natural_key_index(scratch_manager):
+    scratch_manager.collection.drop()
+    reading = {'dataset_id': 'FD001', 'dataset_type': 'train', 'unit_number': 1, 'time_cycles': 1}
+    scratch_manager.collection.insert_many([dict(reading), dict(reading)])
+    scratch_manager._create_indexes()
+    natural_key = [
+        index for index in scratch_manager.collection.list_indexes()
+        if list(index['key']) == ['dataset_id', 'dataset_type', 'unit_number', 'time_cycles']
+    ]
+    assert len(natural_key) == 1
+    assert not natural_key[0].get('unique')
+
+
+def _plan_stages(plan):
+    """Stage names of a query plan tree"""
+    stages = [plan['stage']] if 'stage' in plan else []
+    for child in [plan.get('inputStage'), plan.get('queryPlan')] + plan.get('inputStages', []):
+        if child:
+            stages += _plan_stages(child)
+    return stages
+
+
+def test_sensor_trends_plan_has_no_sort(manager):
+    plan = manager.collection.find(
+        {'unit_number': 1, 'dataset_id': 'FD001', 'dataset_type': 'train'}
+    ).sort('time_cycles', 1).hint(MONGO_TRENDS_INDEX).explain()
+    # Served in index order: no blocking SORT stage in the winning plan
+    assert 'SORT' not in _plan_stages(plan['queryPlanner']['winningPlan'])
+
+
+def test_aggregate_heavy_hint(manager):
+    result = manager._aggregate_heavy([
+        {"$match": {"dataset_id": "FD001", "dataset_type": "train"}},
+        {"$group": {"_id": "$unit_number", "cycles": {"$max": "$time_cycles"}}},
+        {"$sort": {"_id": 1}},
+    ])
+    assert result == [{'_id': 1, 'cycles': 3}, {'_id': 2, 'cycles': 3}]
+
+
+def test_materialized_hint(manager):
+    docs = manager._materialized(
+        "index_test", "FD001", "train",
+        [{"$match": {"dataset_id": "FD001", "dataset_type": "train"}},
+         {"$group": {"_id": "$unit_number", "n": {"$sum": 1}}},
+         {"$project": {"unit_number": "$_id", "n": 1, "_id": 0}}],
+        [("unit_number", 1)], refresh=True,
+    )
+    assert docs == [{'unit_number': 1, 'n': 3}, {'unit_number': 2, 'n': 3}]
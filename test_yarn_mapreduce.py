@@ -2,6 +2,7 @@
 """
 Simple test script to verify MapReduce YARN execution
 Tests the cycle_counter job on a small HDFS dataset
+Run directly, or under pytest with the session fixture from conftest.py
 """
 
 import sys
@@ -10,15 +11,25 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.mapreduce_manager import MapReduceManager
+from yarn_helpers import LOCAL_TEST_INPUT, SMALL_JOB_JOBCONF, prepare_yarn_cluster
 
-def test_yarn_execution():
+
+def run_yarn_execution(cluster):
+    """
+    Run mr_cycle_counter on YARN through MapReduceManager
+    
+    Returns:
+        tuple: (success: bool, output: job stdout or error details)
+    """
     print("=" * 60)
     print("YARN MapReduce Test Script")
     print("=" * 60)
     
-    # Initialize MapReduce manager
-    mrm = MapReduceManager()
+    # Imported lazily so a down cluster (probed by the caller) fails before the import cost
+    from backend.mapreduce_manager import MapReduceManager
+    
+    # Initialize MapReduce manager on the job files located (or staged) by prepare_yarn_cluster
+    mrm = MapReduceManager(container_jobs_dir=cluster.jobs_dir)
     
     # Test with cycle counter job
     job_script = "mr_cycle_counter.py"
@@ -31,7 +42,7 @@ def test_yarn_execution():
     print("-" * 60)
     
     # Run the job
-    success, output = mrm.run_job(job_script, input_file, runner="hadoop")
+    success, output = mrm.run_job(job_script, input_file, runner="hadoop", extra_jobconf=SMALL_JOB_JOBCONF)
     
     print("\n" + "=" * 60)
     if success:
@@ -44,13 +55,47 @@ def test_yarn_execution():
         print("=" * 60)
         print("\nError Details:")
         print(output)
-        return False
+        return False, output
     
     print("\n" + "=" * 60)
     print("Test completed!")
     print("=" * 60)
-    return True
+    return True, output
+
+
+def expected_max_cycles():
+    """unit_number -> max time_cycles of the local copy of the job input"""
+    max_cycles = {}
+    with open(LOCAL_TEST_INPUT) as f:
+        for line in f:
+            parts = line.split(None, 2)
+            if len(parts) >= 2:
+                unit, cycle = int(parts[0]), int(parts[1])
+                max_cycles[unit] = max(cycle, max_cycles.get(unit, 0))
+    return max_cycles
+
+
+def parse_max_cycles(output):
+    """unit_number -> max_cycle records of the job output"""
+    max_cycles = {}
+    for line in output.splitlines():
+        if "\t" in line:
+            unit, cycle = line.split("\t", 1)
+            max_cycles[int(unit)] = int(cycle)
+    return max_cycles
+
+
+def test_yarn_execution(yarn_cluster):
+    success, output = run_yarn_execution(yarn_cluster)
+    assert success
+    # Keyed on the unit column: an offset-prefixed line would key on the byte offset
+    assert parse_max_cycles(output) == expected_max_cycles()
+
 
 if __name__ == "__main__":
-    result = test_yarn_execution()
-    sys.exit(0 if result else 1)
+    cluster = prepare_yarn_cluster()
+    if cluster is None:
+        print("❌ YARN NOT READY: no running NodeManager (is the cluster up?)")
+        sys.exit(1)
+    success, _ = run_yarn_execution(cluster)
+    sys.exit(0 if success else 1)
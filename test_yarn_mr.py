@@ -1,50 +1,113 @@
 #!/usr/bin/env python3
 """
 Simple test script to verify YARN MapReduce setup
+Run directly, or under pytest with the session fixture from conftest.py
 """
+import json
+import re
 import subprocess
 import sys
-import os
 
-def test_yarn_mapreduce():
-    """Test if MapReduce job runs successfully with YARN"""
-    
-    # Copy script to container
-    script_path = "mapreduce_jobs/mr_sensor_stats.py"
-    config_path = "mapreduce_jobs/mrjob.conf"
+from yarn_helpers import (LOCAL_TEST_INPUT, SMALL_JOB_JOBCONF, check_perf_baseline, parse_counters,
+                          prepare_yarn_cluster)
+
+# YARN application id as printed by the Hadoop job client
+APP_ID_PATTERN = re.compile(r"application_\d+_\d+")
+# Shuffle volume expected with the combiner in place (one partial per mapper)
+MAX_SHUFFLE_BYTES = 10_000_000
+# Container log bytes fetched for a failed application (tail of each log file)
+FAILURE_LOG_BYTES = 65536
+
+
+def run_yarn_mapreduce(cluster):
+    """
+    Run mr_sensor_stats on YARN
     
-    container_script = "/tmp/mr_sensor_stats.py"
-    container_config = "/tmp/mrjob.conf"
+    Returns:
+        tuple: (success: bool, counters: dict of Hadoop job counters,
+                stats: the job's Sensor_11 output record, or None)
+    """
+    container_script = f"{cluster.jobs_dir}/mr_sensor_stats.py"
+    container_config = f"{cluster.jobs_dir}/mrjob.conf"
     
-    print("1. Copying files to namenode container...")
-    subprocess.run(["docker", "cp", script_path, f"namenode:{container_script}"], check=True)
-    subprocess.run(["docker", "cp", config_path, f"namenode:{container_config}"], check=True)
+    print(f"1. Using job files at {cluster.jobs_dir}")
     
     print("2. Running MapReduce job with YARN...")
     cmd = [
-        "docker", "exec", "namenode", 
+        "docker", "exec", cluster.container, 
         "python3", container_script,
         "-r", "hadoop",
         "--conf-path", container_config,
-        "hdfs://namenode:9000/bda_project/uploads/train_FD001.txt"
     ]
+    for key, value in SMALL_JOB_JOBCONF.items():
+        cmd.extend(["--jobconf", f"{key}={value}"])
+    cmd.append("hdfs://namenode:9000/bda_project/uploads/train_FD001.txt")
     
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    print("\n=== STDOUT ===")
-    print(result.stdout)
+    # Stream the job log as it is produced (stderr merged in), one line in memory at a time
+    app_id = None
+    stats = None
+    counter_lines = []
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+    for line in proc.stdout:
+        sys.stdout.write(line)
+        if line.startswith('"Sensor_11"\t'):
+            stats = json.loads(line.split("\t", 1)[1])
+        elif "=" in line or "Counters:" in line:
+            counter_lines.append(line)
+        if app_id is None:
+            match = APP_ID_PATTERN.search(line)
+            if match:
+                app_id = match.group(0)
+    proc.wait()
+    counters = parse_counters(counter_lines)
     
-    if result.stderr:
-        print("\n=== STDERR ===")
-        print(result.stderr)
+    if app_id:
+        print(f"\nYARN application: {app_id}")
     
-    if result.returncode == 0:
+    if proc.returncode == 0:
         print("\n✅ SUCCESS: MapReduce job completed with YARN!")
-        return True
+        return True, counters, stats
     else:
-        print(f"\n❌ FAILED: Exit code {result.returncode}")
-        return False
+        print(f"\n❌ FAILED: Exit code {proc.returncode}")
+        if app_id:
+            # Task logs only on failure, and only their tail
+            print(f"\n=== YARN LOGS ({app_id}, last {FAILURE_LOG_BYTES} bytes per file) ===", flush=True)
+            subprocess.run(["docker", "exec", cluster.container, "yarn", "logs",
+                            "-applicationId", app_id, "-size", str(-FAILURE_LOG_BYTES)])
+        return False, counters, stats
+
+
+def expected_sensor_stats():
+    """Sensor 11 count/min/max of the local copy of the job input"""
+    with open(LOCAL_TEST_INPUT) as f:
+        values = [float(line.split()[15]) for line in f if line.strip()]
+    return {"count": len(values), "min": min(values), "max": max(values)}
+
+
+def test_yarn_mapreduce(yarn_cluster):
+    """Test if MapReduce job runs successfully with YARN"""
+    success, counters, stats = run_yarn_mapreduce(yarn_cluster)
+    assert success
+    # Every input line parsed, and the right column read: an offset-prefixed line
+    # (input format key not dropped) would be skipped or shift every field by one
+    assert stats is not None, "No Sensor_11 record in the job output"
+    expected = expected_sensor_stats()
+    assert {k: stats[k] for k in expected} == expected, (stats, expected)
+    assert "Reduce shuffle bytes" in counters, f"No job counters parsed from the job log: {counters}"
+    assert counters["Reduce shuffle bytes"] < MAX_SHUFFLE_BYTES, counters
+    regressions = check_perf_baseline("mr_sensor_stats", counters)
+    assert not regressions, regressions
+
 
 if __name__ == "__main__":
-    success = test_yarn_mapreduce()
+    cluster = prepare_yarn_cluster()
+    if cluster is None:
+        print("❌ YARN NOT READY: no running NodeManager (is the cluster up?)")
+        sys.exit(1)
+    success, counters, stats = run_yarn_mapreduce(cluster)
+    if stats:
+        print(f"Sensor_11: {stats}")
+    for name in ("Map input records", "Reduce shuffle bytes", "CPU time spent (ms)"):
+        if name in counters:
+            print(f"{name}: {counters[name]:,}")
     sys.exit(0 if success else 1)
@@ -0,0 +1,201 @@
+"""
+Shared helpers for the YARN MapReduce smoke tests (test_yarn_mr.py, test_yarn_mapreduce.py,
+run_yarn_suite.py): cluster probe, job-file staging, container exec and job counters.
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import subprocess
+import tarfile
+from types import SimpleNamespace
+
+# Optional: one persistent Docker API connection for every exec/copy (docker SDK)
+try:
+    import docker
+except ImportError:
+    docker = None
+# Without the SDK installed, the repo's docker/ directory (image build files)
+# imports as an empty namespace package: treat that as no SDK
+if docker is not None and not hasattr(docker, "from_env"):
+    docker = None
+
+from backend.config import MAPREDUCE_CONFIG, NAMENODE_CONTAINER
+
+JOBS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mapreduce_jobs")
+# Staged into /tmp when the container lacks the mapreduce_jobs/ mount
+STAGED_FILES = ["cmapss_job.py", "mr_sensor_stats.py", "mr_cycle_counter.py", "mrjob.conf"]
+
+# Local copy of the HDFS test input (/bda_project/uploads/train_FD001.txt): the
+# reference the job outputs are checked against
+LOCAL_TEST_INPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "CMAPSS", "train_FD001.txt")
+
+# Test inputs are tiny: run the whole job inside the AM's JVM (uber mode needs <= 1 reducer)
+SMALL_JOB_JOBCONF = {
+    "mapreduce.job.ubertask.enable": "true",
+    "mapreduce.job.ubertask.maxmaps": "4",
+    "mapreduce.job.reduces": "1",
+}
+
+# Hadoop job counters as printed by mrjob ("Reduce shuffle bytes=1234")
+COUNTER_PATTERN = re.compile(r"^\s+([A-Za-z][^=]*?)=(\d+)\s*$")
+# Counters recorded per job on this machine (git-ignored); a run exceeding REGRESSION_FACTOR x the baseline fails
+PERF_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "yarn_perf_baseline.json")
+TRACKED_COUNTERS = ["Reduce shuffle bytes", "Map output materialized bytes"]
+REGRESSION_FACTOR = 2
+
+# Docker SDK client and container handles, created on first use
+_docker_client = None
+_containers = {}
+
+# Local file digests: (path, mtime) -> sha256 hex
+_local_digests = {}
+
+
+def _local_digest(path):
+    key = (path, os.path.getmtime(path))
+    if key not in _local_digests:
+        with open(path, "rb") as f:
+            _local_digests[key] = hashlib.sha256(f.read()).hexdigest()
+    return _local_digests[key]
+
+
+def _container(name):
+    """docker SDK handle for a container, or None (SDK missing or daemon unreachable)"""
+    global _docker_client
+    if docker is None:
+        return None
+    if name not in _containers:
+        try:
+            if _docker_client is None:
+                _docker_client = docker.from_env(timeout=60)
+            _containers[name] = _docker_client.containers.get(name)
+        except docker.errors.DockerException as e:
+            print(f"Docker SDK unavailable, using the docker CLI: {e}")
+            _containers[name] = None
+    return _containers[name]
+
+
+def container_exec(container, args, workdir=None, timeout=None):
+    """
+    Runs a command in a container over the shared SDK connection (no docker CLI
+    process per call), falling back to `docker exec`.
+
+    Returns:
+        tuple: (exit code, stdout text)
+    """
+    handle = _container(container)
+    if handle is not None:
+        result = handle.exec_run(args, workdir=workdir, demux=True)
+        stdout = (result.output[0] or b"").decode("utf-8", errors="replace")
+        return result.exit_code, stdout
+
+    cmd = ["docker", "exec"] + (["-w", workdir] if workdir else []) + [container] + list(args)
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    return result.returncode, result.stdout
+
+
+def _sync_to_container(names, remote_dir, container=NAMENODE_CONTAINER):
+    """
+    Copies mapreduce_jobs/ files into a container directory, skipping those whose
+    container copy is identical: one sha256sum exec, then one tar stream
+    (built in memory) through a single docker exec for whatever changed.
+    """
+    _, stdout = container_exec(container, ["sha256sum", *names], workdir=remote_dir)
+    remote_digests = {}
+    for line in stdout.splitlines():
+        digest, _, name = line.partition("  ")
+        remote_digests[name] = digest
+
+    changed = [name for name in names
+               if remote_digests.get(name) != _local_digest(os.path.join(JOBS_DIR, name))]
+    if not changed:
+        return
+
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w") as tar:
+        for name in changed:
+            tar.add(os.path.join(JOBS_DIR, name), arcname=name)
+    handle = _container(container)
+    if handle is not None:
+        if not handle.put_archive(remote_dir, archive.getvalue()):
+            raise RuntimeError(f"Copy into {container}:{remote_dir} failed")
+        return
+    subprocess.run(["docker", "exec", "-i", container, "tar", "-x", "-C", remote_dir],
+                   input=archive.getvalue(), check=True)
+
+
+def parse_counters(lines):
+    """Counters from the 'Counters:' section(s) of a job log as {name: int}"""
+    counters = {}
+    in_counters = False
+    for line in lines:
+        if "Counters:" in line:
+            in_counters = True
+            continue
+        if in_counters:
+            match = COUNTER_PATTERN.match(line)
+            if match:
+                counters[match.group(1).strip()] = int(match.group(2))
+    return counters
+
+
+def check_perf_baseline(job_name, counters):
+    """
+    Compares TRACKED_COUNTERS against the recorded baseline for job_name
+    (recording the first run into the local, git-ignored baseline file).
+    Returns a list of regression messages; missing counters count as one.
+    """
+    missing = [name for name in TRACKED_COUNTERS if name not in counters]
+    if missing:
+        return [f"Counters not found in the job log: {', '.join(missing)}"]
+
+    baseline = {}
+    if os.path.exists(PERF_BASELINE_PATH):
+        with open(PERF_BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    recorded = baseline.get(job_name)
+    if recorded is None:
+        baseline[job_name] = {name: counters[name] for name in TRACKED_COUNTERS}
+        with open(PERF_BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Recorded {job_name} baseline in {PERF_BASELINE_PATH}: {baseline[job_name]}")
+        return []
+
+    return [f"{name}: {counters[name]:,} > {REGRESSION_FACTOR}x baseline {recorded[name]:,}"
+            for name in TRACKED_COUNTERS
+            if name in recorded and counters[name] > REGRESSION_FACTOR * recorded[name]]
+
+
+def yarn_ready(container=NAMENODE_CONTAINER):
+    """Fast ResourceManager probe: at least one RUNNING NodeManager (seconds, not a submit timeout)"""
+    try:
+        returncode, stdout = container_exec(container, ["yarn", "node", "-list", "-states", "RUNNING"],
+                                            timeout=10)
+    except Exception as e:
+        print(f"YARN probe failed: {e}")
+        return False
+    return returncode == 0 and "Total Nodes:0" not in stdout
+
+
+def prepare_yarn_cluster(container=NAMENODE_CONTAINER):
+    """
+    Probes YARN and locates the job files inside the namenode: the read-only
+    mapreduce_jobs/ mount (docker-compose.yml), or copies staged into /tmp.
+
+    Returns:
+        SimpleNamespace(ready, jobs_dir, container) or None when YARN is not ready
+    """
+    if not yarn_ready(container):
+        return None
+
+    jobs_dir = MAPREDUCE_CONFIG["container_jobs_dir"]
+    mounted = container_exec(container, ["test", "-f", f"{jobs_dir}/mrjob.conf"])[0] == 0
+    if not mounted:
+        # Container created without the mount: fall back to copying into /tmp
+        jobs_dir = "/tmp"
+        _sync_to_container(STAGED_FILES, jobs_dir, container=container)
+
+    return SimpleNamespace(ready=True, jobs_dir=jobs_dir, container=container)